@@ -0,0 +1,123 @@
+"""
+Fixed benchmark positions and their reference perft counts.
+
+Each position carries its perft counts, the number of move sequences of length
+1, 2, 3... from it, as computed by Board.get_valid_moves. They are the
+correctness oracle for any other move generator.
+
+Diagrams list rows 0 to 7 from the top: 'w'/'r' are white/red men, 'W'/'R' kings
+and '.' empty squares. WHITE starts on rows 0-2 and moves down, RED moves up.
+"""
+from collections import namedtuple
+from utils.board import Board
+from utils.parameters import ROWS, COLS, RED, WHITE
+from utils.piece import Piece
+
+Position = namedtuple('Position', ['name', 'category', 'rows', 'color', 'perft'])
+
+CORPUS = [
+    Position('initial', 'opening', (
+        '.w.w.w.w',
+        'w.w.w.w.',
+        '.w.w.w.w',
+        '........',
+        '........',
+        'r.r.r.r.',
+        '.r.r.r.r',
+        'r.r.r.r.',
+    ), RED, [7, 49, 379, 2872, 23582, 190647, 1607254, 13411609]),
+    Position('midgame-quiet', 'midgame', (
+        '.w.w...w',
+        '..w.w...',
+        '.w...w.w',
+        '..w.....',
+        '.r.r....',
+        'r...r.r.',
+        '...r.r.r',
+        'r.r.....',
+    ), WHITE, [8, 70, 614, 5460, 49109, 431455, 3918460]),
+    Position('midgame-tactical', 'midgame', (
+        '...w.w..',
+        'w...w...',
+        '.w.w...w',
+        '..r.w...',
+        '.w...r..',
+        'r.r...r.',
+        '.....r.r',
+        'r...r...',
+    ), RED, [8, 68, 535, 4660, 37855, 334951, 2730502]),
+    Position('kings-vs-king-and-man', 'endgame', (
+        '........',
+        '........',
+        '...W....',
+        '........',
+        '.....r..',
+        '..R.....',
+        '........',
+        '......W.',
+    ), WHITE, [6, 36, 224, 1317, 8142, 42468, 264011]),
+    Position('three-men-vs-two', 'endgame', (
+        '........',
+        '....w...',
+        '.w......',
+        '........',
+        '...r....',
+        '......w.',
+        '.r......',
+        '........',
+    ), RED, [4, 24, 82, 457, 1501, 7230, 22575]),
+    Position('six-kings-each', 'kings', (
+        '.R...W..',
+        '..W.....',
+        '.....R..',
+        'W...R...',
+        '...W...R',
+        '..R...W.',
+        '.W......',
+        '....R...',
+    ), WHITE, [15, 215, 3393, 50384, 786649, 11702127, 177852839]),
+    Position('kings-and-men', 'kings', (
+        '...R....',
+        'w.....w.',
+        '.W...w..',
+        '........',
+        '.....R..',
+        'r...W...',
+        '...r...R',
+        '........',
+    ), RED, [9, 90, 904, 8859, 91545, 875945, 9062049]),
+]
+
+
+def board_from_rows(rows):
+    """
+    Build a Board from a diagram.
+
+    Args:
+    - rows: Eight strings of eight characters, see the module docstring.
+
+    Returns:
+    - The Board, with its counters, hash and positional accumulators set.
+    """
+    board = Board()
+    board.board = [[0] * COLS for _ in range(ROWS)]
+    board.red_left = board.white_left = board.red_kings = board.white_kings = 0
+    for row, line in enumerate(rows):
+        for col, char in enumerate(line):
+            if char == '.':
+                continue
+            piece = Piece(row, col, WHITE if char in 'wW' else RED)
+            if char.isupper():
+                piece.make_king()
+            board.board[row][col] = piece
+            if piece.color == WHITE:
+                board.white_left += 1
+                board.white_kings += piece.king
+            else:
+                board.red_left += 1
+                board.red_kings += piece.king
+    board.skip = []
+    board.hash = board.compute_hash()
+    board.tempo, board.back_rank, board.piece_square = board.compute_positional()
+    board.red_mask, board.white_mask = board.compute_masks()
+    return board
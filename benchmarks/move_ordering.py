@@ -0,0 +1,79 @@
+"""
+Compare node counts and cut-off indices with and without move ordering.
+
+Run from the repository root:
+    python -m benchmarks.move_ordering [depth]
+"""
+import random
+import sys
+from math import inf
+from minimax.algorithm import alpha_beta_in_place, get_all_valid_moves, SearchControl
+from minimax.ordering import MoveOrdering
+from minimax.transposition import TranspositionTable
+from utils.board import Board
+from utils.parameters import RED, WHITE
+
+
+def benchmark_positions(count=20, seed=2024):
+    """
+    Build a fixed set of positions by seeded random play from the initial position.
+
+    Args:
+    - count: Number of positions.
+    - seed: Seed of the random playouts.
+
+    Returns:
+    - A list of (board, max_player) tuples.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = Board()
+        color = RED
+        for _ in range(rng.randrange(4, 40)):
+            moves = get_all_valid_moves(board, color)
+            if not moves or board.winner() is not None:
+                break
+            piece, destination, skip = rng.choice(moves)
+            board.make_move(piece, destination[0], destination[1], skip)
+            color = WHITE if color == RED else RED
+        if board.winner() is None and get_all_valid_moves(board, color):
+            positions.append((board, color == WHITE))
+    return positions
+
+
+def measure(positions, depth, selected_option, ordered):
+    """
+    Search every position and add up the search counters.
+
+    Args:
+    - positions: List of (board, max_player) tuples.
+    - depth: The search depth.
+    - selected_option: The selected difficulty level.
+    - ordered: Whether to use MoveOrdering.
+
+    Returns:
+    - The SearchControl holding the totals.
+    """
+    control = SearchControl()
+    for board, max_player in positions:
+        ordering = MoveOrdering() if ordered else None
+        alpha_beta_in_place(board, depth, -inf, inf, max_player, selected_option, TranspositionTable(), control,
+                            ordering=ordering)
+    return control
+
+
+def main():
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    positions = benchmark_positions()
+    print(f"{len(positions)} positions, depth {depth}")
+    for selected_option in ("Basic Level", "Intermediate Level", "Advance Level"):
+        before = measure(positions, depth, selected_option, False)
+        after = measure(positions, depth, selected_option, True)
+        print(f"{selected_option:20} nodes {before.nodes:>9} -> {after.nodes:>9} "
+              f"({after.nodes / before.nodes:.0%})   "
+              f"avg cut-off index {before.average_cutoff_index:.2f} -> {after.average_cutoff_index:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Time root-parallel search against the serial search and check they pick the same move.
+
+Run from the repository root:
+    python -m benchmarks.parallel [depth]
+"""
+import sys
+from math import inf
+from time import perf_counter
+from benchmarks.move_ordering import benchmark_positions
+from minimax.algorithm import alpha_beta_ending
+from minimax.parallel import ParallelSearch
+
+WORKER_COUNTS = (1, 2, 4, 8)
+SELECTED_OPTION = "Advance Level"
+
+
+def main():
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    positions = benchmark_positions(count=8)
+
+    start = perf_counter()
+    serial = [alpha_beta_ending(board, depth, -inf, inf, max_player, None, SELECTED_OPTION, in_place=True)
+              for board, max_player in positions]
+    serial_time = perf_counter() - start
+    print(f"{len(positions)} positions, depth {depth}: serial {serial_time:.2f}s")
+
+    for workers in WORKER_COUNTS:
+        with ParallelSearch(workers) as search:
+            start = perf_counter()
+            results = [search.search(board, depth, max_player, SELECTED_OPTION) for board, max_player in positions]
+            elapsed = perf_counter() - start
+        same = all(value == serial_value and board.new_step == serial_board.new_step
+                   and board.hash == serial_board.hash
+                   for (value, board), (serial_value, serial_board) in zip(results, serial))
+        print(f"{workers} workers: {elapsed:.2f}s  speedup {serial_time / elapsed:.2f}x  "
+              f"same moves: {'yes' if same else 'NO'}")
+
+
+if __name__ == '__main__':
+    main()
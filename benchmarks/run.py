@@ -0,0 +1,308 @@
+"""
+Benchmark move generation and search on the fixed corpus and write the results as JSON.
+
+Run from the repository root, once per commit, and diff the outputs:
+    python -m benchmarks.run --output bench-$(git rev-parse --short HEAD).json
+
+Timings depend on the machine; node and perft counts must not change unless the
+move rules or the search do.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tracemalloc
+from copy import deepcopy
+from math import inf
+from time import perf_counter
+from benchmarks.corpus import CORPUS, board_from_rows
+from minimax.algorithm import get_all_moves, get_all_valid_moves, SearchControl
+from minimax.iterative_deepening import iterative_deepening
+from minimax.ordering import MoveOrdering, move_key
+from minimax.transposition import TranspositionTable
+from utils.bitboard import BitBoard
+from utils.parameters import RED, WHITE, SQUARE_SIZE
+
+
+def other(color):
+    """Get the colour of the other side."""
+    return WHITE if color == RED else RED
+
+
+def perft(board, color, depth):
+    """
+    Count the move sequences of a given length with Board make/unmake.
+
+    Args:
+    - board: The position, restored afterwards.
+    - color: The side to move.
+    - depth: The length of the sequences.
+
+    Returns:
+    - The number of sequences.
+    """
+    if depth == 0:
+        return 1
+    moves = get_all_valid_moves(board, color)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for piece, destination, skip in moves:
+        undo = board.make_move(piece, destination[0], destination[1], skip)
+        nodes += perft(board, other(color), depth - 1)
+        board.unmake_move(undo)
+    return nodes
+
+
+def perft_bitboard(bitboard, color, depth):
+    """
+    Count the move sequences of a given length with BitBoard.
+
+    Args:
+    - bitboard: The position.
+    - color: The side to move.
+    - depth: The length of the sequences.
+
+    Returns:
+    - The number of sequences.
+    """
+    if depth == 0:
+        return 1
+    children = bitboard.get_all_moves(color)
+    if depth == 1:
+        return len(children)
+    return sum(perft_bitboard(child, other(color), depth - 1) for child in children)
+
+
+def timed(function, *args):
+    """Call a function and return its result and the seconds it took."""
+    start = perf_counter()
+    result = function(*args)
+    return result, perf_counter() - start
+
+
+def bench_perft(position, depth):
+    """
+    Run perft with Board and BitBoard and check both against the reference count.
+    """
+    depth = min(depth, len(position.perft))
+    expected = position.perft[depth - 1]
+    board = board_from_rows(position.rows)
+    nodes, seconds = timed(perft, board, position.color, depth)
+    bit_nodes, bit_seconds = timed(perft_bitboard, BitBoard.from_board(board), position.color, depth)
+    return {
+        'depth': depth,
+        'expected': expected,
+        'board': {'nodes': nodes, 'ok': nodes == expected, 'seconds': round(seconds, 4),
+                  'nodes_per_second': round(nodes / seconds)},
+        'bitboard': {'nodes': bit_nodes, 'ok': bit_nodes == expected, 'seconds': round(bit_seconds, 4),
+                     'nodes_per_second': round(bit_nodes / bit_seconds)},
+    }
+
+
+def bench_movegen(position, repeat):
+    """
+    Measure get_valid_moves, get_all_valid_moves and get_all_moves calls per second.
+    """
+    board = board_from_rows(position.rows)
+    pieces = board.get_all_pieces(position.color)
+    _, seconds = timed(lambda: [board.get_valid_moves(piece) for _ in range(repeat) for piece in pieces])
+    _, all_seconds = timed(lambda: [get_all_valid_moves(board, position.color) for _ in range(repeat)])
+    _, copy_seconds = timed(lambda: [get_all_moves(board, position.color) for _ in range(repeat)])
+    return {
+        'get_valid_moves_per_second': round(repeat * len(pieces) / seconds),
+        'get_all_valid_moves_per_second': round(repeat / all_seconds),
+        'get_all_moves_per_second': round(repeat / copy_seconds),
+    }
+
+
+class DictPiece:
+    """
+    Stand-in for Piece as it was before it had __slots__: an instance __dict__, the
+    pixel position kept up to date on every move and deepcopy's generic copy. It is
+    the baseline of the board benchmark.
+    """
+
+    def __init__(self, row, col, color):
+        self.row = row
+        self.col = col
+        self.color = color
+        self.king = False
+        self.x = 0
+        self.y = 0
+        self.calc_pos()
+
+    def calc_pos(self):
+        self.x = SQUARE_SIZE * self.col + SQUARE_SIZE // 2
+        self.y = SQUARE_SIZE * self.row + SQUARE_SIZE // 2
+
+    def make_king(self):
+        self.king = True
+
+    def move(self, row, col):
+        self.row = row
+        self.col = col
+        self.calc_pos()
+
+
+def measure_board(board, color, repeat):
+    """
+    Measure the memory of a board and how fast it is copied and moves are made on it.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    copy = deepcopy(board)
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del copy
+
+    _, copy_seconds = timed(lambda: [deepcopy(board) for _ in range(repeat)])
+    moves = get_all_valid_moves(board, color)
+
+    def make_unmake():
+        for _ in range(repeat):
+            for piece, destination, skip in moves:
+                board.unmake_move(board.make_move(piece, destination[0], destination[1], skip))
+
+    _, move_seconds = timed(make_unmake)
+    return {
+        'board_bytes': size,
+        'deepcopy_per_second': round(repeat / copy_seconds),
+        'make_unmake_per_second': round(repeat * len(moves) / move_seconds),
+    }
+
+
+def bench_board(position, repeat):
+    """
+    Measure the memory of a Board and how fast it is copied and moves are made on it,
+    with Piece and, as the baseline, with DictPiece.
+    """
+    result = measure_board(board_from_rows(position.rows), position.color, repeat)
+    baseline = board_from_rows(position.rows)
+    for row in baseline.board:
+        for col, piece in enumerate(row):
+            if piece != 0:
+                row[col] = DictPiece(piece.row, piece.col, piece.color)
+                row[col].king = piece.king
+    result['baseline'] = measure_board(baseline, position.color, repeat)
+    return result
+
+
+def iterate(board, max_player, depth, selected_option, pvs=False, aspiration=None):
+    """
+    Run iterative deepening to a fixed depth, recording the time to reach each depth.
+    """
+    control, time_to_depth = SearchControl(), []
+    start = perf_counter()
+    control.add_hook('iteration', lambda *_: time_to_depth.append(round(perf_counter() - start, 4)))
+    result = iterative_deepening(board, max_player, selected_option, inf, max_depth=depth, tt=TranspositionTable(),
+                                 ordering=MoveOrdering(), stats=control, pvs=pvs, aspiration=aspiration)
+    return result, control, time_to_depth
+
+
+def bench_search(position, depth, selected_option, aspiration):
+    """
+    Measure nodes, nodes per second, time to each depth and peak memory of a search.
+
+    Peak memory comes from a second, traced run so tracing does not skew the timings.
+    The same search is then run with principal variation search and aspiration
+    windows, to compare their nodes and check they find the same value and move.
+    """
+    board = board_from_rows(position.rows)
+    max_player = position.color == WHITE
+    search, control, time_to_depth = iterate(board, max_player, depth, selected_option)
+
+    tracemalloc.start()
+    iterate(board, max_player, depth, selected_option)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    pvs, pvs_control, pvs_time_to_depth = iterate(board, max_player, depth, selected_option, True, aspiration)
+
+    result = control.as_dict()
+    result.update({
+        'depth': depth,
+        'value': search.value,
+        'nodes_per_second': round(control.nodes / time_to_depth[-1]),
+        'time_to_depth': time_to_depth,
+        'peak_memory_kb': round(peak / 1024, 1),
+        'pvs': {
+            'nodes': pvs_control.nodes,
+            'researches': pvs_control.researches,
+            'node_reduction': round(1 - pvs_control.nodes / control.nodes, 3),
+            'time_to_depth': pvs_time_to_depth,
+            'same_value': pvs.value == search.value,
+            'same_move': move_key(pvs.move) == move_key(search.move),
+        },
+    })
+    return result
+
+
+def git_commit():
+    """Get the current commit hash, or None outside a git checkout."""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--perft-depth', type=int, default=6,
+                        help='perft depth, capped by the reference counts of each position')
+    parser.add_argument('--search-depth', type=int, default=6, help='search depth')
+    parser.add_argument('--level', default='Advance Level', help='evaluation level used by the search')
+    parser.add_argument('--aspiration', type=float, default=0.5,
+                        help='half-width of the aspiration window of the principal variation search')
+    parser.add_argument('--movegen-repeat', type=int, default=200, help='move generation calls per position')
+    parser.add_argument('--only', nargs='*', help='names or categories of the positions to run')
+    parser.add_argument('--output', default='-', help="JSON file to write, '-' for stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    results = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'settings': {'perft_depth': options.perft_depth, 'search_depth': options.search_depth,
+                     'level': options.level, 'movegen_repeat': options.movegen_repeat,
+                     'aspiration': options.aspiration},
+        'positions': {},
+    }
+    for position in CORPUS:
+        if options.only and position.name not in options.only and position.category not in options.only:
+            continue
+        print(f"{position.name}...", file=sys.stderr)
+        results['positions'][position.name] = {
+            'category': position.category,
+            'perft': bench_perft(position, options.perft_depth),
+            'movegen': bench_movegen(position, options.movegen_repeat),
+            'board': bench_board(position, options.movegen_repeat),
+            'search': bench_search(position, options.search_depth, options.level, options.aspiration),
+        }
+
+    failed = [name for name, result in results['positions'].items()
+              if not (result['perft']['board']['ok'] and result['perft']['bitboard']['ok'])]
+    results['perft_ok'] = not failed
+    searches = [result['search'] for result in results['positions'].values()]
+    if searches:
+        results['pvs_node_reduction'] = round(
+            1 - sum(search['pvs']['nodes'] for search in searches) / sum(search['nodes'] for search in searches), 3)
+        results['pvs_same_moves'] = all(search['pvs']['same_move'] for search in searches)
+
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if options.output == '-':
+        print(text)
+    else:
+        with open(options.output, 'w') as output:
+            output.write(text + '\n')
+    if failed:
+        print(f"perft mismatch: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,23 +1,15 @@
+import os
 import pygame
 import sys
-from math import inf
-from utils.parameters import WIDTH, HEIGHT, SQUARE_SIZE, RED, WHITE, GREEN, FPS
+from utils.parameters import WIDTH, HEIGHT, SQUARE_SIZE, RED, WHITE, GREEN, FPS, AI_TIME_BUDGET, TABLEBASE_FILE, \
+    BOOK_FILE, RECORD_FILE
 from utils.game import Game
-from minimax.algorithm import alpha_beta_ending
-
-# Create the main window
-screen_one = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Checkers")
-
-# Create the Second Window
-screen_two = pygame.display.set_mode((WIDTH, HEIGHT))
-
-pygame.init()
-pygame.font.init()
-
-# Fonts
-title_font = pygame.font.Font("assets/Cheri400.ttf", 100)
-button_font = pygame.font.Font("assets/Cheri400.ttf", 28)
+from minimax.transposition import TranspositionTable
+from minimax.ordering import MoveOrdering
+from minimax.tablebase import Tablebase
+from minimax.book import OpeningBook
+from minimax.ponder import Ponderer
+from minimax.background import BackgroundSearch
 
 # Drop-down menu options
 options = ["Basic Level", "Intermediate Level", "Advance Level"]
@@ -35,10 +27,28 @@ def get_row_col_from_mouse(pos):
 def main():
     """Main function to run the game."""
     global selected_option
+
+    # Create the main window
+    screen_one = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Checkers")
+
+    # Create the Second Window
+    screen_two = pygame.display.set_mode((WIDTH, HEIGHT))
+
+    pygame.init()
+    pygame.font.init()
+
+    # Fonts
+    title_font = pygame.font.Font("assets/Cheri400.ttf", 100)
+    button_font = pygame.font.Font("assets/Cheri400.ttf", 28)
+
     run = True
     clock = pygame.time.Clock()
     game = Game(screen_two)
-    depth = 2
+    tt = TranspositionTable()
+    ordering = MoveOrdering()
+    tablebase = Tablebase(TABLEBASE_FILE) if os.path.exists(TABLEBASE_FILE) else None
+    book = OpeningBook(BOOK_FILE) if os.path.exists(BOOK_FILE) else None
 
     # Main loop
     running = True
@@ -87,6 +97,18 @@ def main():
         # Cap the frame rate
         pygame.time.Clock().tick(FPS)
 
+    # The book moves were searched with the evaluation of a single level
+    if book is not None and book.level != selected_option:
+        book = None
+
+    # Search the AI's answers in the background while the human thinks
+    ponderer = Ponderer(selected_option, tt, ordering, tablebase=tablebase, book=book)
+    ponderer.start(game.get_board(), RED)
+    # The AI's search in progress, run in a worker thread so the frame loop keeps its pace
+    search = None
+    # Hand the interpreter lock back to the frame loop every millisecond rather than every 5
+    sys.setswitchinterval(0.001)
+
     # Game loop
     while run:
         clock.tick(FPS)
@@ -94,22 +116,49 @@ def main():
             print(game.winner())
             break
 
-        if game.turn == WHITE:
-            value, new_board = alpha_beta_ending(game.get_board(), depth, -inf, inf, WHITE, game, selected_option)
-            game.ai_move(new_board)
+        if game.turn == WHITE and search is None:
+            result = ponderer.answer(game.get_board(), True)
+            if result is not None:
+                game.ai_move(result.board, result.move)
+                if game.winner() is None:
+                    ponderer.start(game.get_board(), RED)
+            else:
+                search = BackgroundSearch(game.get_board(), True, selected_option, AI_TIME_BUDGET, tt=tt,
+                                          ordering=ordering, tablebase=tablebase, book=book)
+        elif search is not None and search.done():
+            result = search.result()
+            game.ai_move(result.board, result.move)
+            search = None
+            if game.winner() is None:
+                ponderer.start(game.get_board(), RED)
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                if search is not None:
+                    search.cancel()
+                ponderer.stop()
                 pygame.quit()
                 sys.exit()
 
-            if event.type == pygame.MOUSEBUTTONDOWN:
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_s:
+                game.save(RECORD_FILE, {'level': selected_option})
+                print(f"Game saved to {RECORD_FILE}")
+
+            if event.type == pygame.WINDOWEXPOSED:
+                game.renderer.invalidate()
+
+            if event.type == pygame.MOUSEBUTTONDOWN and game.turn == RED:
                 pos = pygame.mouse.get_pos()
                 row, col = get_row_col_from_mouse(pos)
                 game.select(row, col)
 
-        game.update()
+        status = None
+        if search is not None:
+            depth, nodes = search.progress
+            status = f"Thinking... depth {depth}, {nodes} nodes"
+        game.update(status)
 
+    ponderer.stop()
     pygame.quit()
 
 
@@ -0,0 +1,98 @@
+"""
+Headless checkers engine: board, move generation, evaluation and search.
+
+Nothing imported here loads pygame, so the engine runs on servers without a
+display. WHITE is the maximizing player, RED the minimizing one.
+"""
+from math import inf
+from utils.board import Board
+from utils.parameters import RED, WHITE, AI_TIME_BUDGET
+from minimax.algorithm import alpha_beta_ending, evaluate_position, get_all_moves, get_all_valid_moves
+from minimax.batch import BatchEvaluator
+from minimax.book import OpeningBook
+from minimax.cache import SearchCache, search_settings
+from minimax.evaluation import EVALUATORS, register_evaluator
+from minimax.iterative_deepening import iterative_deepening, MAX_DEPTH
+from minimax.ordering import MoveOrdering
+from minimax.quiescence import Quiescence
+from minimax.tablebase import Tablebase
+from minimax.transposition import TranspositionTable
+
+LEVELS = tuple(EVALUATORS)
+
+
+class Engine:
+    def __init__(self, selected_option="Advance Level", time_budget=AI_TIME_BUDGET, depth=None, tt_size=1 << 16,
+                 tablebase=None, book=None, batch=None, cache=None, quiescence=None, pvs=False, aspiration=None):
+        """
+        Initialize an engine with its own transposition table and move ordering.
+
+        Args:
+        - selected_option: The difficulty level, one of LEVELS.
+        - time_budget: Thinking time per move, in milliseconds.
+        - depth: Optional fixed depth. When given, every move is searched to exactly
+          this depth and the time budget is ignored.
+        - tt_size: Slots in the transposition table.
+        - tablebase: Optional Tablebase, or the path of a tablebase file, to solve
+          endgames with few pieces exactly.
+        - book: Optional OpeningBook, or the path of a book file, whose moves are
+          played without searching. A book built for another level is ignored.
+        - batch: Optional BatchEvaluator scoring the leaves with NumPy, or True for
+          the one matching selected_option.
+        - cache: Optional SearchCache, or the path of a cache file, of search results
+          shared with other engines and processes. Call close() when done so the
+          last results are written. A SearchCache given here must be opened for
+          selected_option and the quiescence, pvs and tablebase settings of this
+          engine.
+        - quiescence: Optional Quiescence searching captures past the depth horizon,
+          or True for one with the default node budget.
+        - pvs: Use principal variation search instead of plain alpha-beta.
+        - aspiration: Optional half-width of the aspiration window around the
+          previous iteration's value, e.g. 0.5 for half a man.
+        """
+        self.selected_option = selected_option
+        self.time_budget = time_budget
+        self.depth = depth
+        self.tt = TranspositionTable(tt_size)
+        self.ordering = MoveOrdering()
+        self.tablebase = Tablebase(tablebase) if isinstance(tablebase, str) else tablebase
+        self.book = OpeningBook(book) if isinstance(book, str) else book
+        if self.book is not None and self.book.level != selected_option:
+            self.book = None
+        self.batch = BatchEvaluator.from_level(selected_option) if batch is True else batch
+        self.quiescence = Quiescence() if quiescence is True else quiescence
+        self.pvs = pvs
+        settings = search_settings(self.quiescence, pvs, self.tablebase)
+        self.cache = SearchCache(cache, selected_option, settings) if isinstance(cache, str) else cache
+        if self.cache is not None and (self.cache.level, self.cache.settings) != (selected_option, settings):
+            raise ValueError(f"search cache opened for {self.cache.scope}, not for this engine's settings")
+        self.aspiration = aspiration
+
+    def search(self, board, color):
+        """
+        Choose a move for one side.
+
+        Args:
+        - board: The current board, left unchanged.
+        - color: The side to move, RED or WHITE.
+
+        Returns:
+        - A SearchResult; its move is None when the game is over, see Board.result.
+        """
+        time_budget, max_depth = (inf, self.depth) if self.depth is not None else (self.time_budget, MAX_DEPTH)
+        return iterative_deepening(board, color == WHITE, self.selected_option, time_budget, max_depth=max_depth,
+                                   tt=self.tt, ordering=self.ordering, tablebase=self.tablebase, book=self.book,
+                                   batch=self.batch, cache=self.cache, quiescence=self.quiescence, pvs=self.pvs,
+                                   aspiration=self.aspiration)
+
+    def close(self):
+        """
+        Write the pending results of the search cache, if any, and close it.
+        """
+        if self.cache is not None:
+            self.cache.close()
+
+
+__all__ = ['BatchEvaluator', 'Board', 'Engine', 'EVALUATORS', 'LEVELS', 'RED', 'WHITE', 'MoveOrdering', 'OpeningBook',
+           'Quiescence', 'SearchCache', 'Tablebase', 'TranspositionTable', 'alpha_beta_ending', 'evaluate_position',
+           'get_all_moves', 'get_all_valid_moves', 'iterative_deepening', 'register_evaluator']
@@ -1,12 +1,78 @@
-import pygame
 from copy import deepcopy
 from math import inf
+from time import perf_counter
 import sys
 sys.path.append('C:\\Users\\karmel\\Desktop\\Projects\\Checkers-AI\\Checkers_AI\\utils')
 from utils.parameters import WHITE, RED
+from utils.board import can_move
+from utils.zobrist import position_key
+from minimax.transposition import EXACT, LOWER, UPPER
+from minimax.ordering import move_key
+from minimax.evaluation import evaluator_for, get_evaluator
+from minimax.stats import SearchStats
 
+# Width of the null windows of principal variation search. Scores are floats, so
+# there is no "next" score to use; any small positive width gives the same result.
+NULL_WINDOW = 1e-6
 
-def alpha_beta_ending(position, depth, alpha, beta, max_player, game, selected_option):
+
+def evaluate_position(position, selected_option):
+    """
+    Evaluate a position with the evaluation function of the selected difficulty level.
+
+    Args:
+    - position: The board position to evaluate, a Board or BitBoard.
+    - selected_option: The selected difficulty level, a name in minimax.evaluation.EVALUATORS.
+
+    Returns:
+    - The evaluation value.
+    """
+    return evaluator_for(position, selected_option)(position)
+
+
+def terminal_value(winner):
+    """
+    Score a finished game, where a side has no piece left, like one where a side
+    cannot move: the side that lost gets the worst possible score.
+
+    Args:
+    - winner: The message returned by Board.winner or BitBoard.winner.
+
+    Returns:
+    - inf if WHITE has won, -inf if RED has.
+    """
+    return inf if winner.startswith('WHITE') else -inf
+
+
+def evaluate_leaf(position, evaluator, stats):
+    """
+    Evaluate a leaf of the search, recording it in the search statistics when given.
+
+    Args:
+    - position: The board position to evaluate.
+    - evaluator: The compiled evaluation function of the search.
+    - stats: Optional SearchStats.
+
+    Returns:
+    - The evaluation value.
+    """
+    if stats is None:
+        return evaluator(position)
+    stats.leaves += 1
+    if stats.timing:
+        start = perf_counter()
+        value = evaluator(position)
+        stats.add_time('evaluation', start)
+    else:
+        value = evaluator(position)
+    if stats.hooks['leaf']:
+        stats.emit('leaf', position, value)
+    return value
+
+
+def alpha_beta_ending(position, depth, alpha, beta, max_player, game, selected_option, in_place=False, tt=None,
+                      stats=None, tablebase=None, batch=None, evaluator=None, cache=None, quiescence=None,
+                      pvs=False):
     """
     Alpha-beta pruning minimax algorithm with different evaluation functions based on the selected difficulty level.
 
@@ -18,48 +84,525 @@ def alpha_beta_ending(position, depth, alpha, beta, max_player, game, selected_o
     - max_player: A boolean indicating whether the current player is the maximizing player.
     - game: The Game object.
     - selected_option: The selected difficulty level.
+    - in_place: Search by making and unmaking moves on the position instead of
+      deep-copying a board per move. The result is the same either way.
+    - tt: Optional TranspositionTable shared between searches. Implies in_place.
+    - stats: Optional SearchStats filled in by the search.
+    - tablebase: Optional Tablebase probed below the root once few enough pieces are
+      left. Implies in_place.
+    - batch: Optional BatchEvaluator scoring the leaves in batches. Implies in_place.
+    - evaluator: The compiled evaluation function of selected_option, looked up
+      once at the root and passed down.
+    - cache: Optional SearchCache whose stored results of at least the depth
+      searched are used instead of searching again. Implies in_place.
+    - quiescence: Optional Quiescence searching captures past the depth horizon
+      until the position is quiet. Implies in_place.
+    - pvs: Use principal variation search, see alpha_beta_in_place. Implies in_place.
 
     Returns:
     - The evaluation value and the best move.
     """
-    # Base case: if at the root node or the game is over, return the evaluation of the current position.
-    if depth == 0 or position.winner() is not None:
-        if selected_option == "Basic Level":
-            return position.evaluate_basic(), position
-        elif selected_option == "Intermediate Level":
-            return position.evaluate_intermediate(), position
-        else:
-            return position.evaluate_advanced(), position
+    if (in_place or tt is not None or tablebase is not None or batch is not None or cache is not None
+            or quiescence is not None or pvs):
+        value, move = alpha_beta_in_place(position, depth, alpha, beta, max_player, selected_option, tt, stats,
+                                          tablebase=tablebase, batch=batch, cache=cache, quiescence=quiescence,
+                                          pvs=pvs)
+        if move is None:
+            # Like the copying search, a leaf or finished game comes back as the position itself.
+            return value, position if depth == 0 or position.winner() is not None or position.is_draw() else None
+        return value, board_after_move(position, move)
+
+    if stats is not None:
+        stats.visit()
+        if stats.hooks['node']:
+            stats.emit('node', position, depth, None)
+    if evaluator is None:
+        evaluator = get_evaluator(selected_option)
+    # Base case: the game is over or the depth is reached
+    winner = position.winner()
+    if winner is not None:
+        return terminal_value(winner), position
+    if position.is_draw():
+        return 0, position
+    if depth == 0:
+        if not position.has_moves(WHITE if max_player else RED):
+            # A side that cannot move loses
+            return -inf if max_player else inf, position
+        return evaluate_leaf(position, evaluator, stats), position
 
     if max_player:
         max_evaluation = -inf
         best_move = None
-        for move in get_all_moves(position, WHITE):
-            evaluation = alpha_beta_ending(move, depth - 1, alpha, beta, False, game, selected_option)[0]
+        for index, move in enumerate(get_all_moves(position, WHITE, stats)):
+            evaluation = alpha_beta_ending(move, depth - 1, alpha, beta, False, game, selected_option, stats=stats,
+                                           evaluator=evaluator)[0]
+            if best_move is None or evaluation > max_evaluation:
+                best_move = move
             max_evaluation = max(max_evaluation, evaluation)
             alpha = max(alpha, evaluation)
             if beta <= alpha:
                 # Alpha-beta pruning for maximizing player
+                record_cutoff(move, index, None, depth, stats, None)
                 break
-            if max_evaluation == evaluation:
-                best_move = move
         return max_evaluation, best_move
     else:
         min_evaluation = inf
         best_move = None
-        for move in get_all_moves(position, RED):
-            evaluation = alpha_beta_ending(move, depth - 1, alpha, beta, True, game, selected_option)[0]
+        for index, move in enumerate(get_all_moves(position, RED, stats)):
+            evaluation = alpha_beta_ending(move, depth - 1, alpha, beta, True, game, selected_option, stats=stats,
+                                           evaluator=evaluator)[0]
+            if best_move is None or evaluation < min_evaluation:
+                best_move = move
             min_evaluation = min(min_evaluation, evaluation)
             beta = min(beta, evaluation)
             if beta <= alpha:
                 # Alpha-beta pruning for minimizing player
+                record_cutoff(move, index, None, depth, stats, None)
                 break
-            if min_evaluation == evaluation:
-                best_move = move
 
         return min_evaluation, best_move
 
 
+def alpha_beta_bitboard(position, depth, alpha, beta, max_player, game, selected_option, evaluator=None):
+    """
+    Alpha-beta pruning minimax algorithm on a BitBoard.
+
+    Drop-in replacement for alpha_beta_ending that searches the same tree, in the same
+    order, with the same evaluation functions, but without copying Board objects.
+    Convert the result back with BitBoard.to_board() for the UI. A BitBoard has no
+    position history, so the draw rules do not apply, and a side that cannot move
+    is only noticed above the depth horizon.
+
+    Args:
+    - position: The current position as a BitBoard.
+    - depth: The depth of the search tree.
+    - alpha: The best value that the maximizing player can guarantee.
+    - beta: The best value that the minimizing player can guarantee.
+    - max_player: A boolean indicating whether the current player is the maximizing player.
+    - game: The Game object.
+    - selected_option: The selected difficulty level.
+    - evaluator: The compiled BitBoard evaluation function of selected_option,
+      looked up once at the root and passed down.
+
+    Returns:
+    - The evaluation value and the best move as a BitBoard.
+    """
+    if evaluator is None:
+        evaluator = get_evaluator(selected_option, bitboard=True)
+    winner = position.winner()
+    if winner is not None:
+        return terminal_value(winner), position
+    if depth == 0:
+        return evaluator(position), position
+
+    if max_player:
+        max_evaluation = -inf
+        best_move = None
+        for move in position.get_all_moves(WHITE):
+            evaluation = alpha_beta_bitboard(move, depth - 1, alpha, beta, False, game, selected_option, evaluator)[0]
+            if best_move is None or evaluation > max_evaluation:
+                best_move = move
+            max_evaluation = max(max_evaluation, evaluation)
+            alpha = max(alpha, evaluation)
+            if beta <= alpha:
+                break
+        return max_evaluation, best_move
+    else:
+        min_evaluation = inf
+        best_move = None
+        for move in position.get_all_moves(RED):
+            evaluation = alpha_beta_bitboard(move, depth - 1, alpha, beta, True, game, selected_option, evaluator)[0]
+            if best_move is None or evaluation < min_evaluation:
+                best_move = move
+            min_evaluation = min(min_evaluation, evaluation)
+            beta = min(beta, evaluation)
+            if beta <= alpha:
+                break
+        return min_evaluation, best_move
+
+
+def alpha_beta_in_place(board, depth, alpha, beta, max_player, selected_option, tt=None, control=None,
+                        first_move=None, ordering=None, ply=0, tablebase=None, batch=None, evaluator=None,
+                        cache=None, quiescence=None, pvs=False):
+    """
+    Alpha-beta search that applies each move to the board and takes it back on return.
+
+    Without a transposition table, first_move or ordering it visits the same nodes in
+    the same order as alpha_beta_ending. Either way it leaves the board as it found it, even
+    when the search is stopped with SearchTimeout.
+
+    Args:
+    - board: The current board, modified during the search and restored afterwards.
+    - depth: The depth of the search tree.
+    - alpha: The best value that the maximizing player can guarantee.
+    - beta: The best value that the minimizing player can guarantee.
+    - max_player: A boolean indicating whether the current player is the maximizing player.
+    - selected_option: The selected difficulty level.
+    - tt: Optional TranspositionTable to probe and fill.
+    - control: Optional SearchStats to fill in, or a SearchControl, which also
+      enforces a deadline.
+    - first_move: Optional move to search first at this node, e.g. the best move of
+      the previous iteration.
+    - ordering: Optional MoveOrdering. With it, the hash move (first_move or the
+      transposition table's best move) is tried first, then captures, killers and
+      history.
+    - ply: Distance from the root of the search.
+    - tablebase: Optional Tablebase. Nodes below the root with at most
+      tablebase.max_pieces pieces take their exact score from it instead of being
+      searched; the root is still searched so that a move is returned.
+    - batch: Optional BatchEvaluator. With it, the children of depth 1 nodes are
+      scored in one vectorized call instead of being visited one by one; they
+      count as nodes and leaves but do not fire the 'node' and 'leaf' hooks.
+    - evaluator: The compiled evaluation function of selected_option, looked up
+      once at the root and passed down.
+    - cache: Optional SearchCache shared with other processes. Nodes at least
+      cache.min_depth deep use a stored result of at least their depth, like a
+      transposition table entry, and store their own.
+    - quiescence: Optional Quiescence searching the captures of the depth 0 nodes
+      instead of evaluating them straight away. Replaces batch at the frontier.
+    - pvs: Principal variation search. Every move after the first is searched with
+      a null window around alpha (beta at minimizing nodes), and searched again with
+      the full window only when it turns out better. Same value, fewer nodes when
+      the first move is usually best.
+
+    Returns:
+    - The evaluation value and the best move as a (piece, destination, skip) tuple, or None.
+    """
+    return _alpha_beta_in_place(board, depth, alpha, beta, max_player, selected_option, tt, control, first_move,
+                                ordering, ply, tablebase, batch, evaluator, cache, quiescence, pvs)[:2]
+
+
+def _alpha_beta_in_place(board, depth, alpha, beta, max_player, selected_option, tt=None, control=None,
+                         first_move=None, ordering=None, ply=0, tablebase=None, batch=None, evaluator=None,
+                         cache=None, quiescence=None, pvs=False):
+    """
+    The search of alpha_beta_in_place, with the same arguments.
+
+    Returns:
+    - The evaluation value, the best move, and whether the value depends on the
+      moves played before the node, i.e. a draw by the draw rules was found below
+      it. Such values are not stored in the transposition table or the cache, which
+      are keyed by the position alone.
+    """
+    if control is not None:
+        control.visit()
+        if control.hooks['node']:
+            control.emit('node', board, depth, ply)
+    if evaluator is None:
+        evaluator = get_evaluator(selected_option)
+    winner = board.winner()
+    if winner is not None:
+        return terminal_value(winner), None, False
+    if board.is_draw():
+        return 0, None, True
+    if tablebase is not None and ply > 0 and board.red_left + board.white_left <= tablebase.max_pieces:
+        score = tablebase.score(board, max_player)
+        if score is not None:
+            if control is not None:
+                control.tablebase_hits += 1
+            return score, None, False
+    if depth == 0:
+        if not board.has_moves(WHITE if max_player else RED):
+            # A side that cannot move loses
+            return -inf if max_player else inf, None, False
+        if quiescence is not None:
+            return quiescence.search(board, alpha, beta, max_player, evaluator, control), None, False
+        return evaluate_leaf(board, evaluator, control), None, False
+
+    hash_move = move_key(first_move) if first_move is not None else None
+    cached = cache is not None and depth >= cache.min_depth
+    if tt is not None or cached:
+        key = position_key(board.hash, max_player)
+        entry = tt.probe(key) if tt is not None else None
+        if cached and (entry is None or entry.depth < depth):
+            entry = cache.probe(key, depth) or entry
+        if entry is not None and hash_move is None:
+            hash_move = entry.best_move
+        if entry is not None and entry.depth >= depth:
+            stored_move = resolve_move(board, entry.best_move)
+            if stored_move is not None or entry.best_move is None:
+                if entry.bound == EXACT:
+                    return entry.score, stored_move, False
+                elif entry.bound == LOWER:
+                    alpha = max(alpha, entry.score)
+                else:
+                    beta = min(beta, entry.score)
+                if beta <= alpha:
+                    return entry.score, stored_move, False
+        alpha_searched, beta_searched = alpha, beta
+
+    timing = control is not None and control.timing
+    if timing:
+        start = perf_counter()
+    moves = get_all_valid_moves(board, WHITE if max_player else RED)
+    if control is not None:
+        control.expand(len(moves))
+    if ordering is not None:
+        ordering.order(moves, ply, hash_move)
+    elif first_move is not None:
+        moves.sort(key=lambda move: move_key(move) != hash_move)
+    if timing:
+        control.add_time('movegen', start)
+
+    if batch is not None and quiescence is None and depth == 1 and moves and (
+            tablebase is None or board.red_left + board.white_left > tablebase.max_pieces + 2):
+        evaluation, best_move, history_dependent = evaluate_frontier(board, moves, max_player, batch, control)
+    elif max_player:
+        max_evaluation = -inf
+        best_move = None
+        history_dependent = False
+        for index, move in enumerate(moves):
+            if timing:
+                start = perf_counter()
+            undo = board.make_move(move[0], move[1][0], move[1][1], move[2])
+            if timing:
+                control.add_time('make_unmake', start)
+            # Principal variation search: after the first move, only ask whether a move beats alpha
+            scout = pvs and index > 0 and alpha > -inf
+            try:
+                evaluation, _, below = _alpha_beta_in_place(
+                    board, depth - 1, alpha, alpha + NULL_WINDOW if scout else beta, False, selected_option, tt,
+                    control, ordering=ordering, ply=ply + 1, tablebase=tablebase, batch=batch, evaluator=evaluator,
+                    cache=cache, quiescence=quiescence, pvs=pvs)
+                history_dependent = history_dependent or below
+                if scout and alpha < evaluation < beta:
+                    if control is not None:
+                        control.researches += 1
+                    evaluation, _, below = _alpha_beta_in_place(
+                        board, depth - 1, alpha, beta, False, selected_option, tt, control, ordering=ordering,
+                        ply=ply + 1, tablebase=tablebase, batch=batch, evaluator=evaluator, cache=cache,
+                        quiescence=quiescence, pvs=pvs)
+                    history_dependent = history_dependent or below
+            finally:
+                if timing:
+                    start = perf_counter()
+                board.unmake_move(undo)
+                if timing:
+                    control.add_time('make_unmake', start)
+            if best_move is None or evaluation > max_evaluation:
+                best_move = move
+            max_evaluation = max(max_evaluation, evaluation)
+            alpha = max(alpha, evaluation)
+            if beta <= alpha:
+                record_cutoff(move, index, ply, depth, control, ordering)
+                break
+        evaluation = max_evaluation
+    else:
+        min_evaluation = inf
+        best_move = None
+        history_dependent = False
+        for index, move in enumerate(moves):
+            if timing:
+                start = perf_counter()
+            undo = board.make_move(move[0], move[1][0], move[1][1], move[2])
+            if timing:
+                control.add_time('make_unmake', start)
+            scout = pvs and index > 0 and beta < inf
+            try:
+                evaluation, _, below = _alpha_beta_in_place(
+                    board, depth - 1, beta - NULL_WINDOW if scout else alpha, beta, True, selected_option, tt,
+                    control, ordering=ordering, ply=ply + 1, tablebase=tablebase, batch=batch, evaluator=evaluator,
+                    cache=cache, quiescence=quiescence, pvs=pvs)
+                history_dependent = history_dependent or below
+                if scout and alpha < evaluation < beta:
+                    if control is not None:
+                        control.researches += 1
+                    evaluation, _, below = _alpha_beta_in_place(
+                        board, depth - 1, alpha, beta, True, selected_option, tt, control, ordering=ordering,
+                        ply=ply + 1, tablebase=tablebase, batch=batch, evaluator=evaluator, cache=cache,
+                        quiescence=quiescence, pvs=pvs)
+                    history_dependent = history_dependent or below
+            finally:
+                if timing:
+                    start = perf_counter()
+                board.unmake_move(undo)
+                if timing:
+                    control.add_time('make_unmake', start)
+            if best_move is None or evaluation < min_evaluation:
+                best_move = move
+            min_evaluation = min(min_evaluation, evaluation)
+            beta = min(beta, evaluation)
+            if beta <= alpha:
+                record_cutoff(move, index, ply, depth, control, ordering)
+                break
+        evaluation = min_evaluation
+
+    # A draw by the draw rules below depends on the moves played before: not stored
+    if (tt is not None or cached) and not history_dependent:
+        if evaluation <= alpha_searched:
+            bound = UPPER
+        elif evaluation >= beta_searched:
+            bound = LOWER
+        else:
+            bound = EXACT
+        stored_move = move_key(best_move) if best_move is not None else None
+        if tt is not None:
+            tt.store(key, depth, evaluation, bound, stored_move)
+        if cached:
+            cache.store(key, depth, evaluation, bound, stored_move)
+    return evaluation, best_move, history_dependent
+
+
+def evaluate_frontier(board, moves, max_player, batch, stats):
+    """
+    Score the children of a depth 1 node in one batch and pick the best.
+
+    The children are then checked like depth 0 nodes of the search: a finished game,
+    a draw or a side that cannot move replaces the batch score.
+
+    Args:
+    - board: The current board.
+    - moves: The node's moves, in search order.
+    - max_player: A boolean indicating whether the current player is the maximizing player.
+    - batch: The BatchEvaluator.
+    - stats: Optional SearchStats counting the children as nodes and leaves.
+
+    Returns:
+    - The best value, the first move reaching it, like the search loop, and whether
+      a child is a draw by the draw rules.
+    """
+    if stats is not None:
+        stats.nodes += len(moves)
+        stats.leaves += len(moves)
+        if stats.timing:
+            start = perf_counter()
+    values = batch.evaluate_moves(board, moves)
+
+    # The checks of the children's depth 0 nodes, done on the occupancy masks
+    if max_player:
+        mover, opponent, opponent_left, won = board.white_mask, board.red_mask, board.red_left, inf
+    else:
+        mover, opponent, opponent_left, won = board.red_mask, board.white_mask, board.white_left, -inf
+    opponent_color = RED if max_player else WHITE
+    opponent_kings = board.king_mask(opponent_color)
+    # Only a king's move without capture keeps the history, which a draw needs
+    quiet = len(board.history) + 1
+    may_draw = ((board.draw_plies is not None and quiet >= board.draw_plies)
+                or (board.draw_repetitions is not None and quiet >= 4))
+    history_dependent = False
+    for index, (piece, destination, skip) in enumerate(moves):
+        if len(skip) >= opponent_left:
+            values[index] = won
+            continue
+        if may_draw and piece.king and not skip:
+            undo = board.make_move(piece, destination[0], destination[1], skip)
+            drawn = board.is_draw()
+            board.unmake_move(undo)
+            if drawn:
+                values[index] = 0
+                history_dependent = True
+                continue
+        captured = 0
+        for taken in skip:
+            captured |= 1 << (4 * taken.row + taken.col // 2)
+        moved = mover ^ (1 << (4 * piece.row + piece.col // 2)) ^ (1 << (4 * destination[0] + destination[1] // 2))
+        if not can_move(opponent_color, opponent & ~captured, moved, opponent_kings & ~captured):
+            values[index] = won
+    index = int(values.argmax() if max_player else values.argmin())
+    if stats is not None and stats.timing:
+        stats.add_time('evaluation', start)
+    return values[index].item(), moves[index], history_dependent
+
+
+def record_cutoff(move, index, ply, depth, stats, ordering):
+    """
+    Report a cut-off to the search statistics and the move ordering, when present.
+
+    Args:
+    - move: The move that caused the cut-off.
+    - index: Position of the move in the node's move list.
+    - ply: Distance from the root of the search.
+    - depth: Remaining depth at the node.
+    - stats: Optional SearchStats.
+    - ordering: Optional MoveOrdering.
+    """
+    if stats is not None:
+        stats.cutoff(index, depth)
+        if stats.hooks['cutoff']:
+            stats.emit('cutoff', move, index, depth, ply)
+    if ordering is not None:
+        ordering.record_cutoff(move, ply, depth)
+
+
+class SearchTimeout(Exception):
+    """Raised inside a search when its SearchControl deadline has passed or it was stopped."""
+
+
+class SearchControl(SearchStats):
+    # Number of nodes between two clock reads.
+    CHECK_EVERY = 256
+
+    def __init__(self, deadline=None, timing=False):
+        """
+        Initialize the statistics and deadline shared by every node of a search.
+
+        Args:
+        - deadline: Optional time.perf_counter() value after which the search stops.
+        - timing: Also measure the time spent in each phase of the search.
+        """
+        super().__init__(timing)
+        self.deadline = deadline
+        self.next_check = self.CHECK_EVERY
+        self.stopped = False
+
+    def stop(self):
+        """
+        Ask the search to stop, e.g. from another thread. It raises SearchTimeout at
+        its next check, within CHECK_EVERY nodes.
+        """
+        self.stopped = True
+
+    def visit(self):
+        """
+        Count a node and raise SearchTimeout once the deadline has passed or stop was called.
+        """
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            # A threshold rather than a modulo, as batched leaves add many nodes at once.
+            self.next_check = self.nodes + self.CHECK_EVERY
+            if self.stopped or self.deadline is not None and perf_counter() >= self.deadline:
+                raise SearchTimeout()
+
+
+def board_after_move(board, move):
+    """
+    Apply a move to a copy of the board.
+
+    Args:
+    - board: The current game board, left unchanged.
+    - move: A (piece, destination, skip) tuple for a piece of this board.
+
+    Returns:
+    - The new board.
+    """
+    piece, destination, skip = move
+    new_board = deepcopy(board)
+    return simulate_move(new_board.get_piece(piece.row, piece.col), destination, new_board, skip)
+
+
+def resolve_move(board, stored_move):
+    """
+    Turn a move stored as ((row, col), destination) back into a move on the board.
+
+    Args:
+    - board: The current game board.
+    - stored_move: The stored move, or None.
+
+    Returns:
+    - A (piece, destination, skip) tuple, or None if the move is not legal here.
+    """
+    if stored_move is None:
+        return None
+    origin, destination = stored_move
+    piece = board.get_piece(*origin)
+    if piece == 0:
+        return None
+    moves = board.get_valid_moves(piece)
+    if destination not in moves:
+        return None
+    return piece, destination, moves[destination]
+
+
 def simulate_move(piece, move, board, skip):
     """
     Simulates a move on the board by updating the piece's position and removing a skipped piece if applicable.
@@ -81,27 +624,57 @@ def simulate_move(piece, move, board, skip):
     return board
 
 
-def get_all_moves(board, color):
+def get_all_moves(board, color, stats=None):
     """
     Generates all possible moves for a given color on the current board.
 
     Args:
     - board: The current game board.
     - color: The color of the pieces for which moves are generated.
+    - stats: Optional SearchStats recording the move count and, when timing, the
+      time spent generating moves and copying boards.
 
     Returns:
     - A list of all possible board positions after valid moves.
     """
     moves = []
+    timing = stats is not None and stats.timing
 
-    for piece in board.get_all_pieces(color):
+    for piece in board.pieces(color):
+        if timing:
+            start = perf_counter()
         valid_moves = board.get_valid_moves(piece)
+        if timing:
+            stats.add_time('movegen', start)
         for move, skip in valid_moves.items():
-            print("skip", skip)
+            if timing:
+                start = perf_counter()
             temp_board = deepcopy(board)
             temp_piece = temp_board.get_piece(piece.row, piece.col)
             new_board = simulate_move(temp_piece, move, temp_board, skip)
+            if timing:
+                stats.add_time('copy', start)
             moves.append(new_board)
+    if stats is not None:
+        stats.expand(len(moves))
+    return moves
+
+
+def get_all_valid_moves(board, color):
+    """
+    Lists all possible moves for a given color without applying them.
+
+    Args:
+    - board: The current game board.
+    - color: The color of the pieces for which moves are generated.
+
+    Returns:
+    - A list of (piece, destination, skip) tuples, in the same order as get_all_moves.
+    """
+    moves = []
+    for piece in board.pieces(color):
+        for move, skip in board.get_valid_moves(piece).items():
+            moves.append((piece, move, skip))
     return moves
 
 
@@ -114,9 +687,12 @@ def draw_moves(game, board, piece):
     - board: The current game board.
     - piece: The selected piece.
     """
+    import pygame
+    from utils.renderer import square_rect
+
     valid_moves = board.get_valid_moves(piece)
     board.draw(game.win)
-    pygame.draw.circle(game.win, (0, 255, 0), (piece.x, piece.y), 50, 5)
+    pygame.draw.circle(game.win, (0, 255, 0), square_rect(piece.row, piece.col).center, 50, 5)
     game.draw_valid_moves(valid_moves.keys())
     pygame.display.update()
     # pygame.time.delay(100)
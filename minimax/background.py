@@ -0,0 +1,58 @@
+"""
+Searches run off the caller's thread, so a UI frame loop keeps running meanwhile.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from minimax.algorithm import SearchControl
+from minimax.iterative_deepening import iterative_deepening
+
+
+class BackgroundSearch:
+    def __init__(self, board, max_player, selected_option, time_budget, **options):
+        """
+        Start an iterative deepening search in a worker thread.
+
+        Args:
+        - board: The current board. The search works on a copy, so the caller can
+          keep drawing it.
+        - max_player: A boolean indicating whether the current player is the maximizing player.
+        - selected_option: The selected difficulty level.
+        - time_budget: Time allowed for the search, in milliseconds.
+        - options: Other keyword arguments of iterative_deepening, e.g. tt or book.
+        """
+        self.control = SearchControl()
+        self.depth = 0
+        self.control.add_hook('iteration', self._iteration)
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.future = self.executor.submit(iterative_deepening, deepcopy(board), max_player, selected_option,
+                                           time_budget, stats=self.control, **options)
+        self.executor.shutdown(wait=False)
+
+    def _iteration(self, depth, value, stats):
+        """Hook recording the deepest completed iteration."""
+        self.depth = depth
+
+    @property
+    def progress(self):
+        """
+        The (deepest completed depth, nodes visited so far) of the search.
+        """
+        return self.depth, self.control.nodes
+
+    def done(self):
+        """True once the result is available."""
+        return self.future.done()
+
+    def result(self):
+        """
+        Get the SearchResult, waiting for it if needed.
+        """
+        return self.future.result()
+
+    def cancel(self):
+        """
+        Stop the search and wait for the worker to finish. The result, if any, is
+        what the completed iterations found.
+        """
+        self.control.stop()
+        self.future.exception()
@@ -0,0 +1,154 @@
+"""
+Vectorized evaluation of many positions at once with NumPy.
+
+A position is encoded as a row of 32 piece codes, one per playable square (see
+utils.bitboard for the numbering). Its score is the sum over the squares of a
+(piece code, square) weight table, plus a bonus for the pieces captured by the
+move that led to it, so a batch of N positions is scored with one fancy-indexing
+lookup on an N x 32 array.
+
+NumPy is optional: the rest of the engine runs without it, only BatchEvaluator
+needs it.
+"""
+from utils.bitboard import SQUARES, row_col_to_square
+from utils.parameters import ROWS, COLS, WHITE
+from utils.positional import CENTRE
+from minimax.evaluation import DEFAULT_LEVEL, EVALUATORS
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Piece codes of the encoding.
+EMPTY, WHITE_MAN, WHITE_KING, RED_MAN, RED_KING = range(5)
+
+# Arguments of BatchEvaluator for the features of minimax.evaluation it can score.
+FEATURE_ARGUMENTS = {'material': 'material', 'kings': 'king', 'capture': 'capture', 'tempo': 'advancement',
+                     'back_rank': 'back_rank', 'centre': 'centre'}
+
+# (row, col) of every square index.
+DARK_SQUARES = [(row, col) for row in range(ROWS) for col in range((row + 1) % 2, COLS, 2)]
+
+# Square indices of utils.positional.CENTRE.
+CENTRE_SQUARES = sorted(row_col_to_square(row, col) for row, col in CENTRE)
+
+
+class BatchEvaluator:
+    def __init__(self, material=1, king=0, advancement=0, back_rank=0, centre=0, capture=0):
+        """
+        Build the weight table of an evaluation. Every term is from WHITE's point of
+        view and mirrored for RED.
+
+        Args:
+        - material: Value of any piece.
+        - king: Extra value of a king.
+        - advancement: Value per row a man has advanced from its home row.
+        - back_rank: Value of a man still on its home row.
+        - centre: Value of any piece on a central square.
+        - capture: Value per piece captured by the move leading to the position, up to
+          two, like the len(board.skip) term of the Board evaluations.
+        """
+        if np is None:
+            raise ImportError("BatchEvaluator requires numpy")
+        table = np.zeros((5, SQUARES))
+        for square in range(SQUARES):
+            row = square // 4
+            table[WHITE_MAN, square] = material + advancement * row + (back_rank if row == 0 else 0)
+            table[RED_MAN, square] = -(material + advancement * (ROWS - 1 - row)
+                                       + (back_rank if row == ROWS - 1 else 0))
+            table[WHITE_KING, square] = material + king
+            table[RED_KING, square] = -(material + king)
+        for code in (WHITE_MAN, WHITE_KING):
+            table[code, CENTRE_SQUARES] += centre
+        for code in (RED_MAN, RED_KING):
+            table[code, CENTRE_SQUARES] -= centre
+        self.table = table
+        self.capture = capture
+        self.columns = np.arange(SQUARES)
+
+    @classmethod
+    def from_level(cls, selected_option):
+        """
+        Build the evaluator matching a level of the evaluation registry.
+
+        Args:
+        - selected_option: The level name; names missing from the registry use
+          DEFAULT_LEVEL, like evaluate_position.
+
+        Returns:
+        - A BatchEvaluator.
+        """
+        weights = EVALUATORS.get(selected_option, EVALUATORS[DEFAULT_LEVEL])
+        unsupported = [name for name, weight in weights.items() if weight and name not in FEATURE_ARGUMENTS]
+        if unsupported:
+            raise ValueError(f"features not supported in batches: {', '.join(unsupported)}")
+        arguments = {'material': 0}
+        arguments.update((FEATURE_ARGUMENTS[name], weight) for name, weight in weights.items() if weight)
+        return cls(**arguments)
+
+    @staticmethod
+    def encode(board):
+        """
+        Encode a Board.
+
+        Args:
+        - board: The board to encode.
+
+        Returns:
+        - An array of 32 piece codes.
+        """
+        codes = [EMPTY] * SQUARES
+        for square, (row, col) in enumerate(DARK_SQUARES):
+            piece = board.board[row][col]
+            if piece != 0:
+                codes[square] = (WHITE_MAN if piece.color == WHITE else RED_MAN) + piece.king
+        return np.array(codes, dtype=np.int8)
+
+    def evaluate(self, positions, captured):
+        """
+        Score a batch of encoded positions.
+
+        Args:
+        - positions: An N x 32 array of piece codes.
+        - captured: An array of N counts of pieces captured by the last move.
+
+        Returns:
+        - An array of N scores.
+        """
+        scores = self.table[positions, self.columns].sum(axis=1)
+        if self.capture:
+            scores += self.capture * np.minimum(captured, 2)
+        return scores
+
+    def evaluate_moves(self, board, moves):
+        """
+        Score the positions after each of a list of moves without making them.
+
+        Args:
+        - board: The current board.
+        - moves: A list of (piece, destination, skip) tuples for pieces of the board.
+
+        Returns:
+        - An array of the scores, in the order of the moves.
+        """
+        count = len(moves)
+        positions = np.repeat(self.encode(board)[None, :], count, axis=0)
+        origins, targets, codes, captured = [], [], [], []
+        capture_rows, capture_squares = [], []
+        for index, (piece, (row, col), skip) in enumerate(moves):
+            king = piece.king or row == 0 or row == ROWS - 1
+            code = (WHITE_MAN if piece.color == WHITE else RED_MAN) + king
+            origins.append(4 * piece.row + piece.col // 2)
+            targets.append(4 * row + col // 2)
+            codes.append(code)
+            captured.append(len(skip))
+            for taken in skip:
+                capture_rows.append(index)
+                capture_squares.append(4 * taken.row + taken.col // 2)
+        rows = np.arange(count)
+        positions[rows, origins] = EMPTY
+        positions[rows, targets] = codes
+        if capture_rows:
+            positions[capture_rows, capture_squares] = EMPTY
+        return self.evaluate(positions, np.array(captured))
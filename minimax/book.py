@@ -0,0 +1,188 @@
+"""
+Opening book: the searched best move of positions near the start of the game.
+
+The book is generated offline by searching every position a game can reach in
+its first few plies, following only the book move for the side the book plays
+and every reply for the other side, once for each side.
+
+File layout, all little-endian:
+    b'CKOB', version (u16), level (32 bytes, UTF-8, zero-padded), entry count (u32),
+    then the entries sorted by key, each
+    key (u64), from row, from col, to row, to col (u8 each), score (f32), depth (u16).
+
+The key is zobrist.position_key of the position, so lookups are a binary search
+over the memory-mapped file. The level is the difficulty level whose evaluation
+the book searches used; a book is only meant for engines playing that level.
+
+Build a book from the repository root with:
+    python -m minimax.book --plies 6 --depth 6 --output opening.book
+"""
+import argparse
+import mmap
+import struct
+import sys
+from collections import namedtuple
+from copy import deepcopy
+from math import inf
+from utils.board import Board
+from utils.parameters import RED, WHITE
+from utils.zobrist import position_key
+from minimax.algorithm import get_all_valid_moves, resolve_move
+from minimax.iterative_deepening import iterative_deepening
+from minimax.ordering import MoveOrdering, move_key
+from minimax.transposition import TranspositionTable
+
+MAGIC = b'CKOB'
+VERSION = 2
+HEADER = struct.Struct('<4sH32sI')
+RECORD = struct.Struct('<QBBBBfH')
+
+BookEntry = namedtuple('BookEntry', ['move', 'score', 'depth'])
+
+
+def generate(plies, depth, selected_option, progress=None):
+    """
+    Search the positions of the first plies of the game.
+
+    Args:
+    - plies: How many plies from the initial position the book covers.
+    - depth: Search depth of every book move.
+    - selected_option: The difficulty level whose evaluation the searches use.
+    - progress: Optional function called with a message after each ply.
+
+    Returns:
+    - A dictionary from position key to BookEntry, with moves stored as
+      ((row, col), destination).
+    """
+    entries = {}
+    tt, ordering = TranspositionTable(1 << 18), MoveOrdering()
+    for book_color in (RED, WHITE):
+        frontier = {position_key(Board().hash, False): Board()}
+        color = RED
+        for ply in range(plies):
+            next_frontier = {}
+            for key, board in frontier.items():
+                if color == book_color:
+                    if key not in entries:
+                        result = iterative_deepening(board, color == WHITE, selected_option, inf, max_depth=depth,
+                                                     tt=tt, ordering=ordering)
+                        if result.move is None:
+                            continue
+                        entries[key] = BookEntry(move_key(result.move), result.value, result.depth)
+                    moves = [resolve_move(board, entries[key].move)]
+                else:
+                    moves = get_all_valid_moves(board, color)
+                for piece, destination, skip in moves:
+                    child = deepcopy(board)
+                    child.make_move(child.get_piece(piece.row, piece.col), destination[0], destination[1],
+                                    [child.get_piece(captured.row, captured.col) for captured in skip])
+                    next_frontier.setdefault(position_key(child.hash, color == RED), child)
+            frontier = next_frontier
+            color = WHITE if color == RED else RED
+            if progress is not None:
+                progress(f"{'RED' if book_color == RED else 'WHITE'} book, ply {ply + 1}: {len(entries)} entries")
+    return entries
+
+
+def write(entries, path, selected_option):
+    """
+    Write book entries to a file, sorted by key.
+
+    Args:
+    - entries: A dictionary from position key to BookEntry.
+    - path: The file to write.
+    - selected_option: The difficulty level the entries were searched with.
+    """
+    with open(path, 'wb') as output:
+        output.write(HEADER.pack(MAGIC, VERSION, selected_option.encode(), len(entries)))
+        for key in sorted(entries):
+            (from_row, from_col), (to_row, to_col) = entries[key].move
+            output.write(RECORD.pack(key, from_row, from_col, to_row, to_col, entries[key].score,
+                                     entries[key].depth))
+
+
+class OpeningBook:
+    def __init__(self, path):
+        """
+        Open a book file. The file is memory-mapped and searched in place.
+
+        Args:
+        - path: The file written by write.
+        """
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, level, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} opening book")
+        self.level = level.rstrip(b'\0').decode()
+
+    def __len__(self):
+        return self.count
+
+    def lookup(self, key):
+        """
+        Find the entry of a position.
+
+        Args:
+        - key: The zobrist.position_key of the position.
+
+        Returns:
+        - A BookEntry, or None if the position is not in the book.
+        """
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            offset = HEADER.size + middle * RECORD.size
+            middle_key = struct.unpack_from('<Q', self.data, offset)[0]
+            if middle_key < key:
+                low = middle + 1
+            elif middle_key > key:
+                high = middle
+            else:
+                _, from_row, from_col, to_row, to_col, score, depth = RECORD.unpack_from(self.data, offset)
+                return BookEntry(((from_row, from_col), (to_row, to_col)), score, depth)
+        return None
+
+    def probe(self, board, max_player):
+        """
+        Get the book move of a position.
+
+        Args:
+        - board: The current board.
+        - max_player: True if WHITE (the maximizing player) is to move.
+
+        Returns:
+        - The BookEntry and the move as a (piece, destination, skip) tuple of the
+          board, or None if the position is not in the book or its move is not legal
+          (a hash collision).
+        """
+        entry = self.lookup(position_key(board.hash, max_player))
+        if entry is None:
+            return None
+        move = resolve_move(board, entry.move)
+        if move is None:
+            return None
+        return entry, move
+
+    def close(self):
+        """
+        Release the memory map and the file.
+        """
+        self.data.close()
+        self.file.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate an opening book.")
+    parser.add_argument('--plies', type=int, default=6, help='plies from the initial position covered')
+    parser.add_argument('--depth', type=int, default=6, help='search depth of every book move')
+    parser.add_argument('--level', default='Advance Level', help='evaluation level used by the searches')
+    parser.add_argument('--output', default='opening.book', help='file to write')
+    options = parser.parse_args(argv)
+    entries = generate(options.plies, options.depth, options.level,
+                       progress=lambda message: print(message, file=sys.stderr))
+    write(entries, options.output, options.level)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+"""
+Persistent search cache shared between games and processes.
+
+Search results are kept in an SQLite file, keyed by evaluation level, search
+settings and the position key of utils.zobrist, with the depth, score, bound and best move of the
+search, like TranspositionTable entries. Zobrist keys use a fixed seed, so every
+process computes the same key for a position.
+
+The database runs in write-ahead-log mode: any number of processes read while one
+writes. Each SearchCache buffers its stores and the positions it read, and writes
+them in one transaction every batch_size stores and on flush() or close(). A
+flush also evicts the least recently used entries beyond max_entries.
+
+    cache = SearchCache("search.cache", "Advance Level", search_settings(quiescence, pvs, tablebase))
+    ...
+    cache.close()
+"""
+import sqlite3
+import threading
+import time
+from minimax.transposition import TTEntry, EXACT, LOWER, UPPER
+
+BOUNDS = (EXACT, LOWER, UPPER)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    level TEXT NOT NULL,
+    key INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    score REAL NOT NULL,
+    bound INTEGER NOT NULL,
+    move INTEGER,
+    used REAL NOT NULL,
+    PRIMARY KEY (level, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_used ON entries (used);
+"""
+
+# Keep the deeper of two results for the same position.
+UPSERT = """
+INSERT INTO entries (level, key, depth, score, bound, move, used) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (level, key) DO UPDATE SET
+    depth = excluded.depth, score = excluded.score, bound = excluded.bound, move = excluded.move,
+    used = excluded.used
+WHERE excluded.depth >= entries.depth
+"""
+
+
+def search_settings(quiescence=None, pvs=False, tablebase=None):
+    """
+    Describe the search options that change the scores of a search.
+
+    Args:
+    - quiescence: The Quiescence of the search, if any.
+    - pvs: Whether the search uses principal variation search.
+    - tablebase: The Tablebase probed by the search, if any. Tablebases with the
+      same max_pieces hold the same tables.
+
+    Returns:
+    - A string, empty for plain alpha-beta without quiescence or tablebase.
+    """
+    settings = []
+    if tablebase is not None:
+        settings.append(f"tablebase {tablebase.max_pieces}")
+    if quiescence is not None:
+        settings.append(f"quiescence {quiescence.max_nodes}/{quiescence.max_depth}")
+    if pvs:
+        settings.append("pvs")
+    return ", ".join(settings)
+
+
+def _signed(key):
+    """Map an unsigned 64-bit key to SQLite's signed 64-bit integers."""
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+def pack_move(move):
+    """
+    Pack a move key ((row, col), (row, col)) into an integer, None staying None.
+    """
+    if move is None:
+        return None
+    (row, col), (to_row, to_col) = move
+    return ((row * 8 + col) << 6) | (to_row * 8 + to_col)
+
+
+def unpack_move(value):
+    """
+    Unpack an integer made by pack_move.
+    """
+    if value is None:
+        return None
+    origin, destination = value >> 6, value & 63
+    return divmod(origin, 8), divmod(destination, 8)
+
+
+class SearchCache:
+    def __init__(self, path, level, settings="", max_entries=1 << 20, batch_size=1024, min_depth=3, timeout=30):
+        """
+        Open or create a search cache.
+
+        Args:
+        - path: The SQLite file.
+        - level: The evaluation level whose scores are cached. Levels share the file
+          but not the entries.
+        - settings: The search settings, from search_settings, whose scores are
+          cached. Like levels, different settings never read each other's entries.
+        - max_entries: Entries kept in the file, over all levels; the least recently
+          used ones are evicted beyond this.
+        - batch_size: Pending stores that trigger a write.
+        - min_depth: Shallowest search cached. Shallower nodes are quicker to search
+          than to look up.
+        - timeout: Seconds to wait for another process's write to finish.
+        """
+        self.path = path
+        self.level = level
+        self.settings = settings
+        # Entries are stored under the level and settings together
+        self.scope = f"{level} [{settings}]" if settings else level
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self.min_depth = min_depth
+        self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        # Stores not yet written, by key, and keys read since the last write
+        self.pending = {}
+        self.touched = set()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def probe(self, key, depth=0):
+        """
+        Look up a position.
+
+        Args:
+        - key: The Zobrist key of the position.
+        - depth: The depth the caller needs; shallower entries count as misses.
+
+        Returns:
+        - A TTEntry for the position, or None.
+        """
+        with self.lock:
+            entry = self.pending.get(key)
+            if entry is None:
+                row = self.connection.execute(
+                    'SELECT depth, score, bound, move FROM entries WHERE level = ? AND key = ?',
+                    (self.scope, _signed(key))).fetchone()
+                if row is not None:
+                    entry = TTEntry(key, row[0], row[1], BOUNDS[row[2]], unpack_move(row[3]))
+            if entry is None or entry.depth < depth:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.touched.add(key)
+            return entry
+
+    def store(self, key, depth, score, bound, best_move):
+        """
+        Queue a search result for writing. Shallower results than min_depth are dropped.
+
+        Args:
+        - key: The Zobrist key of the position.
+        - depth: The remaining depth the position was searched to.
+        - score: The score found.
+        - bound: EXACT, LOWER or UPPER.
+        - best_move: The best or refuting move as ((row, col), (row, col)), or None.
+        """
+        if depth < self.min_depth:
+            return
+        with self.lock:
+            old = self.pending.get(key)
+            if old is None or depth >= old.depth:
+                self.pending[key] = TTEntry(key, depth, score, bound, best_move)
+                self.stores += 1
+            full = len(self.pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the pending stores and access times in one transaction, then evict the
+        least recently used entries beyond max_entries.
+        """
+        with self.lock:
+            if not self.pending and not self.touched:
+                return
+            now = time.time()
+            rows = [(self.scope, _signed(key), entry.depth, entry.score, BOUNDS.index(entry.bound),
+                     pack_move(entry.best_move), now) for key, entry in self.pending.items()]
+            touched = [(now, self.scope, _signed(key)) for key in self.touched if key not in self.pending]
+            connection = self.connection
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                connection.executemany(UPSERT, rows)
+                connection.executemany('UPDATE entries SET used = ? WHERE level = ? AND key = ?', touched)
+                excess = connection.execute('SELECT COUNT(*) FROM entries').fetchone()[0] - self.max_entries
+                if excess > 0:
+                    connection.execute('DELETE FROM entries WHERE (level, key) IN '
+                                       '(SELECT level, key FROM entries ORDER BY used LIMIT ?)', (excess,))
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            self.pending = {}
+            self.touched = set()
+
+    def close(self):
+        """
+        Write what is pending and close the file.
+        """
+        self.flush()
+        self.connection.close()
+
+    def __len__(self):
+        """The number of entries of this level and settings in the file, pending stores excluded."""
+        with self.lock:
+            return self.connection.execute('SELECT COUNT(*) FROM entries WHERE level = ?', (self.scope,)).fetchone()[0]
+
+    def stats(self):
+        """
+        Get the usage counters of this process.
+
+        Returns:
+        - A dictionary of counters.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'stores': self.stores, 'pending': len(self.pending)}
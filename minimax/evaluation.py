@@ -0,0 +1,261 @@
+"""
+Registry of evaluation functions built from feature/weight tables.
+
+Each difficulty level is a dictionary of feature weights. get_evaluator compiles
+it once into a plain function summing the weighted features, which the search
+looks up at its root and calls at every leaf. Scores are from WHITE's point of view.
+
+Features:
+- material: pieces, WHITE minus RED.
+- kings: kings, WHITE minus RED.
+- capture: pieces captured by the move leading to the position, up to two.
+- tempo: rows advanced by the men from their home row, WHITE minus RED.
+- back_rank: men still on their home row, WHITE minus RED.
+- centre: pieces on the centre squares, WHITE minus RED.
+- mobility: simple (non-capturing) moves available, WHITE minus RED.
+- runaway: men with no piece in front of them on the way to promotion, WHITE minus RED.
+- trapped_kings: kings without any move, RED minus WHITE.
+
+Add a level with register_evaluator("Name", {'material': 1, 'tempo': 0.1}).
+"""
+from collections import namedtuple
+from utils.bitboard import (BitBoard, BOTTOM_ROW, FULL, ROW_MASKS, SQUARES, TOP_ROW, down_left, down_right,
+                            row_col_to_square, up_left, up_right)
+from utils.parameters import RED, ROWS, WHITE
+from utils.positional import CENTRE
+
+# Expression of a feature on a Board and on a BitBoard. Board expressions using the
+# white, red and kings masks (masks=True) get them from board_masks; the tempo,
+# back-rank and centre terms are kept up to date by the Board itself, see
+# utils.positional, so they cost no scan.
+Feature = namedtuple('Feature', ['board', 'bitboard', 'masks'])
+
+FEATURES = {
+    'material': Feature('board.white_left - board.red_left', 'board.white_left - board.red_left', False),
+    'kings': Feature('board.white_kings - board.red_kings', 'board.white_kings - board.red_kings', False),
+    'capture': Feature('len(board.skip[:2]) if board.skip else 0', 'min(board.skipped.bit_count(), 2)', False),
+    'tempo': Feature('board.tempo', 'tempo(white, red, kings)', False),
+    'back_rank': Feature('board.back_rank', 'back_rank(white, red, kings)', False),
+    'centre': Feature('board.piece_square', 'centre(white, red, kings)', False),
+    'mobility': Feature('mobility(white, red, kings)', 'mobility(white, red, kings)', True),
+    'runaway': Feature('runaway(white, red, kings)', 'runaway(white, red, kings)', True),
+    'trapped_kings': Feature('trapped_kings(white, red, kings)', 'trapped_kings(white, red, kings)', True),
+}
+
+# The difficulty levels of the game; the first three match Board.evaluate_basic,
+# evaluate_intermediate and evaluate_advanced.
+EVALUATORS = {
+    "Basic Level": {'material': 1},
+    "Intermediate Level": {'material': 1, 'kings': 1, 'capture': 1},
+    "Advance Level": {'material': 1, 'kings': 0.5, 'capture': 1},
+    "Expert Level": {'material': 1, 'kings': 0.5, 'capture': 1, 'tempo': 0.05, 'back_rank': 0.1, 'centre': 0.1,
+                     'mobility': 0.02, 'runaway': 0.3, 'trapped_kings': 0.25},
+}
+
+# Level used for names missing from the registry, as the original string dispatch did.
+DEFAULT_LEVEL = "Advance Level"
+
+_compiled = {}
+
+
+def _cone(square, steps):
+    """
+    Get the mask of every square a man on a square could reach moving forward.
+    """
+    cone, frontier = 0, 1 << square
+    while frontier:
+        frontier = steps[0](frontier) | steps[1](frontier)
+        cone |= frontier
+    return cone
+
+
+DOWN_CONES = [_cone(square, (down_left, down_right)) for square in range(SQUARES)]
+UP_CONES = [_cone(square, (up_left, up_right)) for square in range(SQUARES)]
+STEPS = (down_left, down_right, up_left, up_right)
+CENTRE_MASK = sum(1 << row_col_to_square(row, col) for row, col in CENTRE)
+
+
+def board_masks(board):
+    """
+    Get the white, red and kings masks of a Board.
+
+    Args:
+    - board: The Board.
+
+    Returns:
+    - A (white, red, kings) tuple of masks.
+    """
+    white, red = board.white_mask, board.red_mask
+    kings = 0
+    if board.white_kings or board.red_kings:
+        for color in (WHITE, RED):
+            for piece in board.pieces(color):
+                if piece.king:
+                    kings |= 1 << row_col_to_square(piece.row, piece.col)
+    return white, red, kings
+
+
+def tempo(white, red, kings):
+    """
+    Rows advanced by the men from their home row, WHITE minus RED.
+    """
+    white_men, red_men = white & ~kings, red & ~kings
+    score = 0
+    for row in range(ROWS):
+        score += row * (white_men & ROW_MASKS[row]).bit_count()
+        score -= (ROWS - 1 - row) * (red_men & ROW_MASKS[row]).bit_count()
+    return score
+
+
+def back_rank(white, red, kings):
+    """
+    Men still on their home row, WHITE minus RED.
+    """
+    return (white & ~kings & TOP_ROW).bit_count() - (red & ~kings & BOTTOM_ROW).bit_count()
+
+
+def centre(white, red, kings):
+    """
+    Pieces on the centre squares, WHITE minus RED.
+    """
+    return (white & CENTRE_MASK).bit_count() - (red & CENTRE_MASK).bit_count()
+
+
+def mobility(white, red, kings):
+    """
+    Simple moves available, WHITE minus RED. Captures are not counted.
+    """
+    empty = ~(white | red) & FULL
+    white_kings, red_kings = white & kings, red & kings
+    white_moves = ((down_left(white) & empty).bit_count() + (down_right(white) & empty).bit_count()
+                   + (up_left(white_kings) & empty).bit_count() + (up_right(white_kings) & empty).bit_count())
+    red_moves = ((up_left(red) & empty).bit_count() + (up_right(red) & empty).bit_count()
+                 + (down_left(red_kings) & empty).bit_count() + (down_right(red_kings) & empty).bit_count())
+    return white_moves - red_moves
+
+
+def runaway(white, red, kings):
+    """
+    Men with no piece of either colour in front of them, WHITE minus RED.
+    """
+    occupied = white | red
+    score = 0
+    men = white & ~kings
+    while men:
+        low = men & -men
+        if not DOWN_CONES[low.bit_length() - 1] & occupied:
+            score += 1
+        men ^= low
+    men = red & ~kings
+    while men:
+        low = men & -men
+        if not UP_CONES[low.bit_length() - 1] & occupied:
+            score -= 1
+        men ^= low
+    return score
+
+
+def trapped_kings(white, red, kings):
+    """
+    Kings that can neither move nor capture, RED minus WHITE.
+    """
+    empty = ~(white | red) & FULL
+    score = 0
+    for own, opponent, sign in ((white, red, -1), (red, white, 1)):
+        own_kings = own & kings
+        while own_kings:
+            low = own_kings & -own_kings
+            if not any(step(low) & empty or step(low) & opponent and step(step(low)) & empty for step in STEPS):
+                score += sign
+            own_kings ^= low
+    return score
+
+
+def register_evaluator(name, weights):
+    """
+    Add or replace a level in the registry.
+
+    Args:
+    - name: The level name, as passed as selected_option to the searches.
+    - weights: Dictionary from feature name, see FEATURES, to its weight. Weights
+      are stored as floats, so NumPy and other numeric types are accepted.
+    """
+    unknown = set(weights) - set(FEATURES)
+    if unknown:
+        raise ValueError(f"unknown evaluation features: {', '.join(sorted(unknown))}")
+    try:
+        EVALUATORS[name] = {feature: float(weight) for feature, weight in weights.items()}
+    except (TypeError, ValueError):
+        raise ValueError(f"evaluation weights must be numbers: {weights!r}") from None
+    for key in [key for key in _compiled if key[0] == name]:
+        del _compiled[key]
+
+
+def compile_evaluator(weights, bitboard=False):
+    """
+    Turn a feature/weight table into a scoring function.
+
+    The weighted features are written out as a single expression, so calling the
+    result costs no loop or dispatch per feature. The weights are bound as names of
+    the function's globals rather than written into the source.
+
+    Args:
+    - weights: Dictionary from feature name to weight. Zero weights are dropped.
+    - bitboard: Compile for BitBoard positions instead of Board ones.
+
+    Returns:
+    - A function taking a position and returning its score.
+    """
+    terms, masks, weight_names = [], False, {}
+    for name, weight in weights.items():
+        if not weight:
+            continue
+        feature = FEATURES[name]
+        expression = feature.bitboard if bitboard else feature.board
+        masks = masks or bitboard or feature.masks
+        if weight == 1:
+            terms.append(f"({expression})")
+        else:
+            weight_names[f"weight_{name}"] = float(weight)
+            terms.append(f"weight_{name} * ({expression})")
+    lines = ["def evaluate(board):"]
+    if masks:
+        lines.append("    white, red, kings = board.white, board.red, board.kings" if bitboard
+                     else "    white, red, kings = board_masks(board)")
+    lines.append(f"    return {' + '.join(terms) or '0'}")
+    namespace = {'board_masks': board_masks, 'tempo': tempo, 'back_rank': back_rank, 'centre': centre,
+                 'mobility': mobility, 'runaway': runaway, 'trapped_kings': trapped_kings, **weight_names}
+    exec('\n'.join(lines), namespace)
+    return namespace['evaluate']
+
+
+def get_evaluator(selected_option, bitboard=False):
+    """
+    Get the compiled evaluation function of a level, compiling it on first use.
+
+    Args:
+    - selected_option: The level name; names missing from the registry use DEFAULT_LEVEL.
+    - bitboard: Get the version for BitBoard positions.
+
+    Returns:
+    - A function taking a position and returning its score.
+    """
+    key = (selected_option, bitboard)
+    if key not in _compiled:
+        weights = EVALUATORS.get(selected_option, EVALUATORS[DEFAULT_LEVEL])
+        _compiled[key] = compile_evaluator(weights, bitboard)
+    return _compiled[key]
+
+
+def evaluator_for(position, selected_option):
+    """
+    Get the evaluation function of a level for the type of a position.
+
+    Args:
+    - position: A Board or BitBoard.
+    - selected_option: The level name.
+
+    Returns:
+    - A function taking a position and returning its score.
+    """
+    return get_evaluator(selected_option, isinstance(position, BitBoard))
@@ -0,0 +1,114 @@
+from collections import namedtuple
+from math import inf
+from time import perf_counter
+from minimax.algorithm import alpha_beta_in_place, board_after_move, SearchControl, SearchTimeout, terminal_value
+from utils.parameters import RED, WHITE
+
+# Deepest iteration tried when the time budget allows it.
+MAX_DEPTH = 64
+
+SearchResult = namedtuple('SearchResult', ['value', 'board', 'depth', 'nodes', 'move', 'stats'])
+
+
+def iterative_deepening(position, max_player, selected_option, time_budget, max_depth=MAX_DEPTH, tt=None,
+                        ordering=None, stats=None, tablebase=None, book=None, batch=None, cache=None,
+                        quiescence=None, pvs=False, aspiration=None):
+    """
+    Search depth 1, 2, 3... until the time budget runs out.
+
+    Each iteration searches the previous iteration's best move first. The first
+    iteration always runs to completion, so there is a move to play even with a
+    tiny budget; later iterations are abandoned as soon as the budget is spent.
+
+    Args:
+    - position: The current board position, left unchanged.
+    - max_player: A boolean indicating whether the current player is the maximizing player.
+    - selected_option: The selected difficulty level.
+    - time_budget: Time allowed for the search, in milliseconds.
+    - max_depth: The deepest iteration to run.
+    - tt: Optional TranspositionTable shared between iterations and moves.
+    - ordering: Optional MoveOrdering shared between iterations and moves.
+    - stats: Optional SearchControl to fill in, e.g. one with hooks registered or
+      timing enabled. Its deadline is set by this function.
+    - tablebase: Optional Tablebase probed by the search. When the position itself
+      is in the tablebase, depth 1 already gives exact scores and the search stops.
+    - book: Optional OpeningBook consulted before searching. A book move is returned
+      with the depth and score it was searched with when the book was built, and
+      no nodes.
+    - batch: Optional BatchEvaluator scoring the leaves in batches.
+    - cache: Optional SearchCache shared between processes.
+    - quiescence: Optional Quiescence extending the search with captures at the
+      horizon. Its counters for this search go to the stats, under 'quiescence'.
+    - pvs: Use principal variation search, see alpha_beta_in_place.
+    - aspiration: Optional half-width of an aspiration window. From depth 2 on, the
+      root is searched with a window this wide around the previous iteration's
+      value, and searched again with the window open on the failing side if the
+      value falls outside it.
+
+    Returns:
+    - A SearchResult with the value and board of the deepest completed iteration,
+      that depth, the number of nodes visited by all iterations, the move played
+      as a (piece, destination, skip) tuple of the original board, and the
+      SearchControl with the statistics of the search. When the game is already
+      over (no pieces, no legal move or a draw), the position itself with no move.
+    """
+    winner = position.winner()
+    if winner is not None:
+        return SearchResult(terminal_value(winner), position, 0, 0, None, stats)
+    if not position.has_moves(WHITE if max_player else RED):
+        return SearchResult(-inf if max_player else inf, position, 0, 0, None, stats)
+    if position.is_draw():
+        return SearchResult(0, position, 0, 0, None, stats)
+
+    if book is not None:
+        found = book.probe(position, max_player)
+        if found is not None:
+            entry, move = found
+            control = stats if stats is not None else SearchControl()
+            return SearchResult(entry.score, board_after_move(position, move), entry.depth, 0, move, control)
+
+    deadline = perf_counter() + time_budget / 1000
+    if ordering is not None:
+        ordering.age()
+    control = stats if stats is not None else SearchControl()
+    control.deadline = None
+    tt_before = tt.stats() if tt is not None else None
+    quiescence_before = quiescence.stats() if quiescence is not None else None
+    value, best_move, completed = None, None, 0
+    solved = tablebase is not None and position.red_left + position.white_left <= tablebase.max_pieces
+    for depth in range(1, max_depth + 1):
+        try:
+            alpha, beta = -inf, inf
+            if aspiration is not None and completed and abs(value) != inf:
+                alpha, beta = value - aspiration, value + aspiration
+            while True:
+                score, move = alpha_beta_in_place(position, depth, alpha, beta, max_player, selected_option, tt,
+                                                  control, first_move=best_move, ordering=ordering,
+                                                  tablebase=tablebase, batch=batch, cache=cache,
+                                                  quiescence=quiescence, pvs=pvs)
+                if alpha > -inf and score <= alpha:
+                    alpha = -inf
+                elif beta < inf and score >= beta:
+                    beta = inf
+                else:
+                    break
+                control.researches += 1
+            value, best_move = score, move
+        except SearchTimeout:
+            break
+        completed = depth
+        control.deadline = deadline
+        if control.hooks['iteration']:
+            control.emit('iteration', depth, value, control)
+        if best_move is None or solved or perf_counter() >= deadline:
+            break
+
+    if tt is not None:
+        tt_after = tt.stats()
+        control.tt = {name: tt_after[name] - tt_before[name] for name in ('hits', 'misses', 'collisions', 'stores')}
+        control.tt['fill'] = tt_after['fill']
+    if quiescence is not None:
+        control.quiescence = {name: count - quiescence_before[name] for name, count in quiescence.stats().items()}
+
+    new_board = board_after_move(position, best_move) if best_move is not None else None
+    return SearchResult(value, new_board, completed, control.nodes, best_move, control)
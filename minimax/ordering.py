@@ -0,0 +1,84 @@
+def move_key(move):
+    """
+    Get a key identifying a move independently of the board objects.
+
+    Args:
+    - move: A (piece, destination, skip) tuple.
+
+    Returns:
+    - The ((row, col), destination) of the move, as stored in the transposition table.
+    """
+    return (move[0].row, move[0].col), move[1]
+
+
+class MoveOrdering:
+    # Number of killer moves remembered per ply.
+    KILLERS = 2
+
+    def __init__(self):
+        """
+        Initialize the killer and history tables.
+
+        Moves are tried in this order: the hash move (transposition table or previous
+        iteration), captures by number of pieces taken, the killer moves of the ply,
+        then the rest by history score. Ties keep board scan order.
+        """
+        self.killers = {}
+        self.history = {}
+
+    def order(self, moves, ply, hash_move=None):
+        """
+        Sort moves so the most promising ones are searched first.
+
+        Args:
+        - moves: List of (piece, destination, skip) tuples, sorted in place.
+        - ply: Distance from the root of the search.
+        - hash_move: Optional move key, as returned by move_key, to search first.
+
+        Returns:
+        - The sorted list.
+        """
+        killers = self.killers.get(ply, ())
+        history = self.history
+
+        def priority(move):
+            key = move_key(move)
+            if key == hash_move:
+                return 3, 0, 0
+            if move[2]:
+                return 2, len(move[2]), 0
+            if key in killers:
+                return 1, -killers.index(key), 0
+            return 0, 0, history.get((move[0].color, key), 0)
+
+        moves.sort(key=priority, reverse=True)
+        return moves
+
+    def record_cutoff(self, move, ply, depth):
+        """
+        Remember a move that caused a beta cut-off.
+
+        Quiet moves become killers for the ply and earn a history bonus that grows
+        with the depth of the subtree they refuted.
+
+        Args:
+        - move: The (piece, destination, skip) tuple that caused the cut-off.
+        - ply: Distance from the root of the search.
+        - depth: Remaining depth at the node.
+        """
+        if move[2]:
+            return
+        key = move_key(move)
+        killers = self.killers.setdefault(ply, [])
+        if key not in killers:
+            killers.insert(0, key)
+            del killers[self.KILLERS:]
+        history_key = (move[0].color, key)
+        self.history[history_key] = self.history.get(history_key, 0) + depth * depth
+
+    def age(self):
+        """
+        Prepare for a new search: forget the killers and halve the history scores.
+        """
+        self.killers = {}
+        self.history = {key: score // 2 for key, score in self.history.items() if score > 1}
@@ -0,0 +1,168 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from math import inf
+from minimax.algorithm import (alpha_beta_in_place, board_after_move, evaluate_position, get_all_valid_moves,
+                               terminal_value)
+from minimax.ordering import MoveOrdering
+from minimax.transposition import TranspositionTable
+from utils.bitboard import BitBoard
+from utils.parameters import WHITE, RED
+
+# Per-process search state, created once by _init_worker and kept across moves.
+# Scores depend on the level's evaluation, so each level has its own table.
+_worker_tts = None
+_worker_tt_size = None
+_worker_ordering = None
+
+
+def pack_board(board):
+    """
+    Serialize a Board into a small tuple of ints for sending to a worker process.
+
+    Args:
+    - board: The Board to serialize.
+
+    Returns:
+    - A (white, red, kings, skipped, new_step, history, draw_plies, draw_repetitions)
+      tuple: the first five as taken by BitBoard, then what Board.is_draw needs.
+    """
+    bitboard = BitBoard.from_board(board)
+    return (bitboard.white, bitboard.red, bitboard.kings, bitboard.skipped, bitboard.new_step, tuple(board.history),
+            board.draw_plies, board.draw_repetitions)
+
+
+def unpack_board(packed):
+    """
+    Rebuild a Board from the output of pack_board.
+
+    Args:
+    - packed: A tuple made by pack_board.
+
+    Returns:
+    - The Board.
+    """
+    board = BitBoard(*packed[:5]).to_board()
+    board.history = list(packed[5])
+    board.draw_plies, board.draw_repetitions = packed[6], packed[7]
+    return board
+
+
+def _init_worker(tt_size):
+    """Create the search state of a worker process."""
+    global _worker_tts, _worker_tt_size, _worker_ordering
+    _worker_tts = {}
+    _worker_tt_size = tt_size
+    _worker_ordering = MoveOrdering()
+
+
+def _ready():
+    """No-op task used to start a worker."""
+    return os.getpid()
+
+
+def _search_packed(packed, depth, alpha, beta, max_player, selected_option):
+    """
+    Search a serialized position in a worker process.
+
+    Args:
+    - packed: The position, as returned by pack_board.
+    - depth: The depth of the search tree.
+    - alpha: The best value that the maximizing player can guarantee.
+    - beta: The best value that the minimizing player can guarantee.
+    - max_player: A boolean indicating whether the current player is the maximizing player.
+    - selected_option: The selected difficulty level.
+
+    Returns:
+    - The evaluation value.
+    """
+    board = unpack_board(packed)
+    if selected_option not in _worker_tts:
+        _worker_tts[selected_option] = TranspositionTable(_worker_tt_size)
+    return alpha_beta_in_place(board, depth, alpha, beta, max_player, selected_option, _worker_tts[selected_option],
+                               ordering=_worker_ordering)[0]
+
+
+class ParallelSearch:
+    def __init__(self, workers=None, tt_size=1 << 16):
+        """
+        Start a pool of worker processes for root-parallel search.
+
+        The workers are started here and reused by every call to search, each keeping
+        its own move ordering and one transposition table per level between moves. Call shutdown (or
+        use the object as a context manager) to stop them.
+
+        Args:
+        - workers: Number of worker processes, the CPU count by default.
+        - tt_size: Slots in each transposition table of a worker.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                            initargs=(tt_size,))
+        # Submitting one task per worker at once forces every process to start now.
+        for future in [self.executor.submit(_ready) for _ in range(self.workers)]:
+            future.result()
+
+    def search(self, position, depth, max_player, selected_option):
+        """
+        Search the root moves in parallel, young brothers wait style.
+
+        The first root move is searched alone to get a bound, then all the other root
+        moves are searched at once in the pool against that bound. The best move is the
+        first one, in get_all_valid_moves order, with the best value, which is the move
+        the serial search alpha_beta_ending picks at the same depth.
+
+        Args:
+        - position: The current board position, left unchanged.
+        - depth: The depth of the search tree.
+        - max_player: A boolean indicating whether the current player is the maximizing player.
+        - selected_option: The selected difficulty level.
+
+        Returns:
+        - The evaluation value and the best move, like alpha_beta_ending.
+        """
+        color = WHITE if max_player else RED
+        winner = position.winner()
+        if winner is not None:
+            return terminal_value(winner), position
+        if position.is_draw():
+            return 0, position
+        if depth == 0:
+            if not position.has_moves(color):
+                # A side that cannot move loses
+                return (-inf if max_player else inf), position
+            return evaluate_position(position, selected_option), position
+
+        moves = get_all_valid_moves(position, color)
+        if not moves:
+            return (-inf if max_player else inf), None
+
+        children = []
+        for piece, destination, skip in moves:
+            undo = position.make_move(piece, destination[0], destination[1], skip)
+            children.append(pack_board(position))
+            position.unmake_move(undo)
+
+        best_value = self.executor.submit(_search_packed, children[0], depth - 1, -inf, inf, not max_player,
+                                          selected_option).result()
+        best_move = moves[0]
+        alpha, beta = (best_value, inf) if max_player else (-inf, best_value)
+        futures = [self.executor.submit(_search_packed, child, depth - 1, alpha, beta, not max_player,
+                                        selected_option) for child in children[1:]]
+        for move, future in zip(moves[1:], futures):
+            value = future.result()
+            # Values that do not beat the first move are only bounds; ones that do are exact.
+            if (value > best_value) if max_player else (value < best_value):
+                best_value, best_move = value, move
+        return best_value, board_after_move(position, best_move)
+
+    def shutdown(self):
+        """
+        Stop the worker processes.
+        """
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
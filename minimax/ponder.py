@@ -0,0 +1,138 @@
+"""
+Pondering: searching the AI's answers while the opponent is still thinking.
+
+A Ponderer runs in a background thread on a copy of the board. It tries the
+opponent's replies, most likely first, and searches the AI's answer to each,
+keeping the results in a cache keyed by the position after the reply. The
+transposition table and move ordering it fills are the ones the AI uses, so even
+an unexpected reply finds them warm.
+"""
+import threading
+from collections import namedtuple
+from copy import deepcopy
+from utils.parameters import AI_TIME_BUDGET, RED, WHITE
+from utils.zobrist import position_key
+from minimax.algorithm import board_after_move, get_all_valid_moves, resolve_move, SearchControl
+from minimax.iterative_deepening import iterative_deepening, MAX_DEPTH, SearchResult
+from minimax.ordering import move_key
+
+# A pondered answer: the AI's move as ((row, col), destination), and its search.
+PonderEntry = namedtuple('PonderEntry', ['move', 'value', 'depth', 'nodes'])
+
+
+class Ponderer:
+    def __init__(self, selected_option, tt=None, ordering=None, time_budget=AI_TIME_BUDGET, max_depth=MAX_DEPTH,
+                 tablebase=None, batch=None, book=None):
+        """
+        Initialize a ponderer sharing the AI's search state.
+
+        Args:
+        - selected_option: The difficulty level of the AI.
+        - tt: The AI's TranspositionTable, filled while pondering.
+        - ordering: The AI's MoveOrdering, filled while pondering.
+        - time_budget: Time spent on the answer to each reply, in milliseconds.
+        - max_depth: The deepest iteration of each answer's search.
+        - tablebase: Optional Tablebase probed by the searches.
+        - batch: Optional BatchEvaluator used by the searches.
+        - book: Optional OpeningBook. A reply leading to a book position gets the book
+          move as its answer, like the AI's own search would.
+        """
+        self.selected_option = selected_option
+        self.tt = tt
+        self.ordering = ordering
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.tablebase = tablebase
+        self.batch = batch
+        self.book = book
+        self.cache = {}
+        self.thread = None
+        self.control = None
+        self.stopping = False
+
+    @property
+    def running(self):
+        """True while the background search is running."""
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, board, color):
+        """
+        Start pondering on the opponent's turn. Any earlier pondering is stopped.
+
+        Args:
+        - board: The current board, with the opponent to move. It is copied, so the
+          game can go on changing it.
+        - color: The opponent's colour.
+        """
+        self.stop()
+        self.cache = {}
+        self.stopping = False
+        self.thread = threading.Thread(target=self._ponder, args=(deepcopy(board), color), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop the background search and wait for it to finish. The cache is kept.
+        """
+        self.stopping = True
+        if self.control is not None:
+            self.control.stop()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def answer(self, board, max_player):
+        """
+        Stop pondering and get the pondered answer to the position reached.
+
+        Args:
+        - board: The current board, after the opponent's reply.
+        - max_player: True if the AI plays WHITE (the maximizing player).
+
+        Returns:
+        - A SearchResult like iterative_deepening's, or None if this reply was not
+          pondered to completion; search the position as usual then.
+        """
+        self.stop()
+        entry = self.cache.get(position_key(board.hash, max_player))
+        if entry is None:
+            return None
+        move = resolve_move(board, entry.move)
+        if move is None:
+            return None
+        return SearchResult(entry.value, board_after_move(board, move), entry.depth, entry.nodes, move, None)
+
+    def _ponder(self, board, color):
+        """
+        Search the answer to every reply of the opponent, most likely replies first.
+
+        Args:
+        - board: A private copy of the board, with the opponent to move.
+        - color: The opponent's colour.
+        """
+        replies = get_all_valid_moves(board, color)
+        if self.ordering is not None:
+            hash_move = None
+            if self.tt is not None:
+                entry = self.tt.probe(position_key(board.hash, color == WHITE))
+                hash_move = entry.best_move if entry is not None else None
+            self.ordering.order(replies, 0, hash_move)
+
+        max_player = color == RED
+        for piece, destination, skip in replies:
+            if self.stopping:
+                return
+            undo = board.make_move(piece, destination[0], destination[1], skip)
+            try:
+                self.control = SearchControl()
+                if self.stopping:
+                    return
+                result = iterative_deepening(board, max_player, self.selected_option, self.time_budget,
+                                             max_depth=self.max_depth, tt=self.tt, ordering=self.ordering,
+                                             stats=self.control, tablebase=self.tablebase, batch=self.batch,
+                                             book=self.book)
+                if result.move is not None and not self.control.stopped:
+                    self.cache[position_key(board.hash, max_player)] = PonderEntry(
+                        move_key(result.move), result.value, result.depth, result.nodes)
+            finally:
+                board.unmake_move(undo)
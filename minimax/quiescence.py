@@ -0,0 +1,136 @@
+"""
+Quiescence search: at the depth horizon, keep searching captures until the position is quiet.
+
+A fixed-depth search evaluates the position at its horizon even halfway through
+an exchange, when the material count is about to change. The quiescence search
+goes on from there with capture moves only, so the evaluation is taken after the
+exchange. Captures are not mandatory here, so the side to move may also stop
+capturing: the static evaluation is a lower bound for it ("standing pat").
+
+Each horizon node gets a budget of quiescence nodes; once it is spent, the
+remaining nodes stand pat. The counters of a Quiescence are its own, and
+iterative_deepening reports the part of each search in its stats.
+"""
+from math import inf
+from utils.parameters import RED, WHITE
+from minimax.algorithm import evaluate_leaf, get_all_valid_moves, terminal_value
+
+
+class Quiescence:
+    def __init__(self, max_nodes=64, max_depth=16):
+        """
+        Initialize a quiescence search.
+
+        Args:
+        - max_nodes: Quiescence nodes allowed below each horizon node.
+        - max_depth: Plies of captures searched at most below the horizon.
+        """
+        self.max_nodes = max_nodes
+        self.max_depth = max_depth
+        self.remaining = 0
+        self.nodes = 0
+        self.horizons = 0
+        self.captures = 0
+        self.stand_pats = 0
+        self.truncated = 0
+
+    def search(self, board, alpha, beta, max_player, evaluator, control=None):
+        """
+        Score a horizon node of the main search.
+
+        Args:
+        - board: The board at the horizon, modified during the search and restored afterwards.
+        - alpha: The best value that the maximizing player can guarantee.
+        - beta: The best value that the minimizing player can guarantee.
+        - max_player: A boolean indicating whether the current player is the maximizing player.
+        - evaluator: The compiled evaluation function of the search.
+        - control: Optional SearchStats or SearchControl of the main search. Quiescence
+          nodes count as its nodes, and its deadline applies.
+
+        Returns:
+        - The evaluation value of the quiet positions reached.
+        """
+        self.horizons += 1
+        self.remaining = self.max_nodes
+        return self._search(board, alpha, beta, max_player, evaluator, control, 0)
+
+    def _search(self, board, alpha, beta, max_player, evaluator, control, ply):
+        """
+        Search the captures of a position.
+
+        Args:
+        - ply: Distance from the horizon node; the other arguments are as in search.
+
+        Returns:
+        - The evaluation value.
+        """
+        if ply > 0:
+            if control is not None:
+                control.visit()
+            self.nodes += 1
+            self.remaining -= 1
+        winner = board.winner()
+        if winner is not None:
+            return terminal_value(winner)
+        if board.is_draw():
+            return 0
+        color = WHITE if max_player else RED
+        if not board.has_moves(color):
+            # A side that cannot move loses, as in the main search, and cannot stand pat
+            return -inf if max_player else inf
+        value = evaluate_leaf(board, evaluator, control)
+        if ply >= self.max_depth or self.remaining <= 0:
+            self.truncated += 1
+            return value
+
+        # Standing pat: the side to move may stop capturing
+        if max_player:
+            if value >= beta:
+                self.stand_pats += 1
+                return value
+            alpha = max(alpha, value)
+        else:
+            if value <= alpha:
+                self.stand_pats += 1
+                return value
+            beta = min(beta, value)
+
+        captures = [move for move in get_all_valid_moves(board, color) if move[2]]
+        if not captures:
+            return value
+        # Take the most pieces first
+        captures.sort(key=lambda move: -len(move[2]))
+
+        for piece, destination, skip in captures:
+            self.captures += 1
+            undo = board.make_move(piece, destination[0], destination[1], skip)
+            try:
+                evaluation = self._search(board, alpha, beta, not max_player, evaluator, control, ply + 1)
+            finally:
+                board.unmake_move(undo)
+            if max_player:
+                value = max(value, evaluation)
+                alpha = max(alpha, evaluation)
+            else:
+                value = min(value, evaluation)
+                beta = min(beta, evaluation)
+            if beta <= alpha:
+                break
+        return value
+
+    def stats(self):
+        """
+        Get the counters, e.g. to tune max_nodes.
+
+        Returns:
+        - A dictionary of counters: horizon nodes searched, quiescence nodes below
+          them, captures tried, stand-pat cut-offs and nodes cut short by the budget
+          or max_depth.
+        """
+        return {
+            'horizons': self.horizons,
+            'nodes': self.nodes,
+            'captures': self.captures,
+            'stand_pats': self.stand_pats,
+            'truncated': self.truncated,
+        }
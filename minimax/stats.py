@@ -0,0 +1,139 @@
+from time import perf_counter
+
+# Events a hook can subscribe to, and the arguments its callback receives.
+#   'node':      (board, depth, ply) when a node is entered; ply is None in the copying search
+#   'leaf':      (board, value) after a leaf is evaluated
+#   'cutoff':    (move, index, depth, ply) when a move causes a cut-off, ply as above
+#   'iteration': (depth, value, stats) when iterative deepening completes a depth
+EVENTS = ('node', 'leaf', 'cutoff', 'iteration')
+
+# Categories of the optional time breakdown.
+PHASES = ('movegen', 'evaluation', 'make_unmake', 'copy')
+
+
+class SearchStats:
+    def __init__(self, timing=False):
+        """
+        Initialize the counters of one search.
+
+        Args:
+        - timing: Also measure the time spent in move generation, evaluation and
+          make/unmake or board copies. Off by default as reading the clock around
+          every call slows the search down.
+        """
+        self.nodes = 0
+        self.leaves = 0
+        self.expanded = 0
+        self.moves_generated = 0
+        self.cutoffs = 0
+        self.cutoff_index_total = 0
+        self.cutoffs_by_depth = {}
+        self.tablebase_hits = 0
+        # Searches repeated with a wider window: PVS moves beating the null window
+        # and aspiration windows failing high or low
+        self.researches = 0
+        self.timing = timing
+        self.time = dict.fromkeys(PHASES, 0.0)
+        self.tt = None
+        self.quiescence = None
+        self.hooks = {event: [] for event in EVENTS}
+
+    def add_hook(self, event, callback):
+        """
+        Call a function on every occurrence of a search event.
+
+        Args:
+        - event: One of EVENTS.
+        - callback: The function, called with the event's arguments.
+        """
+        self.hooks[event].append(callback)
+
+    def emit(self, event, *args):
+        """
+        Call the hooks registered for an event.
+
+        Args:
+        - event: One of EVENTS.
+        - args: The event's arguments.
+        """
+        for callback in self.hooks[event]:
+            callback(*args)
+
+    def visit(self):
+        """
+        Count a node.
+        """
+        self.nodes += 1
+
+    def expand(self, move_count):
+        """
+        Count an interior node and the moves generated for it.
+
+        Args:
+        - move_count: Number of moves generated.
+        """
+        self.expanded += 1
+        self.moves_generated += move_count
+
+    def cutoff(self, index, depth):
+        """
+        Count a cut-off.
+
+        Args:
+        - index: Position of the move causing it in the node's move list.
+        - depth: Remaining depth at the node.
+        """
+        self.cutoffs += 1
+        self.cutoff_index_total += index
+        self.cutoffs_by_depth[depth] = self.cutoffs_by_depth.get(depth, 0) + 1
+
+    def add_time(self, phase, start):
+        """
+        Add the time elapsed since start to a phase of the breakdown.
+
+        Args:
+        - phase: One of PHASES.
+        - start: The time.perf_counter() value when the phase began.
+        """
+        self.time[phase] += perf_counter() - start
+
+    @property
+    def average_cutoff_index(self):
+        """
+        Mean position, counted from 0, of the move causing each cut-off. Good move
+        ordering keeps this close to 0.
+        """
+        return self.cutoff_index_total / self.cutoffs if self.cutoffs else 0.0
+
+    @property
+    def branching_factor(self):
+        """
+        Mean number of moves generated per interior node.
+        """
+        return self.moves_generated / self.expanded if self.expanded else 0.0
+
+    def as_dict(self):
+        """
+        Get the counters as plain data, e.g. for logging as JSON.
+
+        Returns:
+        - A dictionary of the counters.
+        """
+        result = {
+            'nodes': self.nodes,
+            'leaves': self.leaves,
+            'expanded': self.expanded,
+            'branching_factor': round(self.branching_factor, 3),
+            'cutoffs': self.cutoffs,
+            'cutoffs_by_depth': dict(sorted(self.cutoffs_by_depth.items())),
+            'average_cutoff_index': round(self.average_cutoff_index, 3),
+            'tablebase_hits': self.tablebase_hits,
+            'researches': self.researches,
+        }
+        if self.timing:
+            result['time'] = {phase: round(seconds, 6) for phase, seconds in self.time.items()}
+        if self.tt is not None:
+            result['tt'] = self.tt
+        if self.quiescence is not None:
+            result['quiescence'] = self.quiescence
+        return result
@@ -0,0 +1,450 @@
+"""
+Endgame tablebases: exact win/loss/draw and distance to the end for small positions.
+
+Tables are built by retrograde analysis over every position with up to
+max_pieces pieces, with the engine's own move rules (a side with no pieces or no
+moves has lost). Positions that never resolve are draws.
+
+There is one table per material signature: the number of white men, white
+kings, red men and red kings. A table only depends on the tables of fewer pieces
+(captures) and of fewer men (promotions), so they are solved one at a time, and
+the positions of a table that lead to each other are found by taking back quiet
+moves instead of being stored. The move rules have no board symmetry to fold
+the tables with: reflecting the board maps dark squares to light ones, and
+swapping the colours does not preserve the rule that a continuation jump towards
+row 0 cannot land on it. Each table keeps both sides to move.
+
+File layout, all little-endian:
+    b'CKTB', version (u16), max_pieces (u16), table count (u16),
+    then for every table: white men, white kings, red men, red kings (u8 each),
+    offset (u64) and entry count (u64),
+    then the tables, one u16 per position.
+
+Within a table the men and kings of each colour are ranked as combinations of
+the squares they can stand on: 28 for men, which never stand on their promotion
+row, and 32 for kings. A position is stored at
+    (((white_men * K(wk) + white_kings) * M(rm) + red_men) * K(rk) + red_kings) * 2 + white_to_move
+where M(n) = comb(28, n) and K(n) = comb(32, n). Entries where two groups
+share a square are INVALID.
+
+Build a file from the repository root with:
+    python -m minimax.tablebase --pieces 4 --output endgame.tb
+"""
+import argparse
+import mmap
+import struct
+import sys
+from array import array
+from itertools import combinations, product
+from math import comb
+from utils.bitboard import BitBoard, FULL, down_left, down_right, row_col_to_square, up_left, up_right
+from utils.parameters import RED, WHITE
+
+MAGIC = b'CKTB'
+VERSION = 2
+HEADER = struct.Struct('<4sHHH')
+TABLE_HEADER = struct.Struct('<4BQQ')
+SQUARES = 32
+
+# Men never stand on their promotion row: white men use squares 0-27, red men 4-31.
+MEN_SQUARES = SQUARES - 4
+RED_MEN_OFFSET = 4
+
+COMB = [[comb(n, k) for k in range(SQUARES + 1)] for n in range(SQUARES + 1)]
+
+# Combinations of squares by (count, squares, offset), and the rank of every
+# combination built so far of each group, see _combinations.
+_COMBINATIONS = {}
+_WHITE_MEN_RANKS = {}
+_RED_MEN_RANKS = {}
+_KING_RANKS = {}
+
+# Entry encoding. Distances are in plies until the side to move wins or loses.
+DRAW = 0
+WIN = 0x8000
+LOSS = 0x4000
+INVALID = 0xFFFF
+DISTANCE = 0x3FFF
+
+# Score of a won position, less the distance so that faster wins score higher.
+WIN_SCORE = 1000
+
+# Steps that take back a quiet move: white men came from above, red men from below.
+WHITE_MAN_UNSTEPS = (up_right, up_left)
+RED_MAN_UNSTEPS = (down_right, down_left)
+KING_UNSTEPS = WHITE_MAN_UNSTEPS + RED_MAN_UNSTEPS
+
+
+def signature(white, red, kings):
+    """
+    Get the material signature of a position.
+
+    Args:
+    - white: Mask of the white pieces.
+    - red: Mask of the red pieces.
+    - kings: Mask of the kings.
+
+    Returns:
+    - A (white men, white kings, red men, red kings) tuple.
+    """
+    return ((white & ~kings).bit_count(), (white & kings).bit_count(), (red & ~kings).bit_count(),
+            (red & kings).bit_count())
+
+
+def material_signatures(max_pieces):
+    """
+    Get the signatures of every table with up to max_pieces pieces.
+
+    Args:
+    - max_pieces: The largest number of pieces.
+
+    Returns:
+    - The signatures with at least one piece on each side, in an order where every
+      table comes after the tables it depends on: by pieces, then by men.
+    """
+    signatures = []
+    for pieces in range(2, max_pieces + 1):
+        for white_men in range(pieces + 1):
+            for white_kings in range(pieces + 1 - white_men):
+                for red_men in range(pieces + 1 - white_men - white_kings):
+                    red_kings = pieces - white_men - white_kings - red_men
+                    if white_men + white_kings and red_men + red_kings:
+                        signatures.append((white_men, white_kings, red_men, red_kings))
+    return sorted(signatures, key=lambda counts: (sum(counts), counts[0] + counts[2]))
+
+
+def _group_sizes(counts):
+    """Get the number of combinations of each group of a signature."""
+    white_men, white_kings, red_men, red_kings = counts
+    return (COMB[MEN_SQUARES][white_men], COMB[SQUARES][white_kings], COMB[MEN_SQUARES][red_men],
+            COMB[SQUARES][red_kings])
+
+
+def table_size(counts):
+    """
+    Get the number of entries in the table of a material signature.
+
+    Args:
+    - counts: The signature, as returned by signature.
+
+    Returns:
+    - The number of entries.
+    """
+    white_men, white_kings, red_men, red_kings = _group_sizes(counts)
+    return white_men * white_kings * red_men * red_kings * 2
+
+
+def _combinations(count, squares, offset, ranks):
+    """
+    Get every combination of count squares out of squares, shifted by offset, as a
+    list of masks by rank, and add their ranks to the ranks dictionary. Built once
+    per combination size and kept.
+    """
+    key = (count, squares, offset)
+    if key not in _COMBINATIONS:
+        masks = [0] * COMB[squares][count]
+        for chosen in combinations(range(squares), count):
+            rank = sum(COMB[square][position] for position, square in enumerate(chosen, 1))
+            masks[rank] = sum(1 << (square + offset) for square in chosen)
+        ranks.update((mask, rank) for rank, mask in enumerate(masks))
+        _COMBINATIONS[key] = masks
+    return _COMBINATIONS[key]
+
+
+def _table_masks(counts):
+    """Get the lists of masks by rank of the four groups of a signature."""
+    white_men, white_kings, red_men, red_kings = counts
+    return (_combinations(white_men, MEN_SQUARES, 0, _WHITE_MEN_RANKS),
+            _combinations(white_kings, SQUARES, 0, _KING_RANKS),
+            _combinations(red_men, MEN_SQUARES, RED_MEN_OFFSET, _RED_MEN_RANKS),
+            _combinations(red_kings, SQUARES, 0, _KING_RANKS))
+
+
+def position_index(white, red, kings, white_to_move):
+    """
+    Get the index of a position in the table of its material signature.
+
+    Args:
+    - white: Mask of the white pieces.
+    - red: Mask of the red pieces.
+    - kings: Mask of the kings.
+    - white_to_move: True if WHITE is to move.
+
+    Returns:
+    - The index in the table.
+
+    Raises:
+    - KeyError if a man stands on its promotion row.
+    """
+    try:
+        return _index(white, red, kings, white_to_move)
+    except KeyError:
+        # First position of this signature: build its combinations and try again.
+        _table_masks(signature(white, red, kings))
+        return _index(white, red, kings, white_to_move)
+
+
+def _index(white, red, kings, white_to_move):
+    """position_index, for signatures whose combinations are built."""
+    white_kings, red_kings = white & kings, red & kings
+    index = _WHITE_MEN_RANKS[white ^ white_kings]
+    index = index * COMB[SQUARES][white_kings.bit_count()] + _KING_RANKS[white_kings]
+    index = index * COMB[MEN_SQUARES][(red ^ red_kings).bit_count()] + _RED_MEN_RANKS[red ^ red_kings]
+    index = index * COMB[SQUARES][red_kings.bit_count()] + _KING_RANKS[red_kings]
+    return index * 2 + (1 if white_to_move else 0)
+
+
+def _position(masks, sizes, index):
+    """Get the (white, red, kings, white_to_move) position at an index, see position_at."""
+    white_to_move = bool(index & 1)
+    index, red_kings = divmod(index >> 1, sizes[3])
+    red_kings = masks[3][red_kings]
+    index, red_men = divmod(index, sizes[2])
+    red_men = masks[2][red_men]
+    white_men, white_kings = divmod(index, sizes[1])
+    white_men, white_kings = masks[0][white_men], masks[1][white_kings]
+    white, red = white_men | white_kings, red_men | red_kings
+    if white & red or white_men & white_kings or red_men & red_kings:
+        return None
+    return white, red, white_kings | red_kings, white_to_move
+
+
+def position_at(counts, index):
+    """
+    Get the position stored at an index of a table.
+
+    Args:
+    - counts: The signature of the table.
+    - index: The index in the table.
+
+    Returns:
+    - A (white, red, kings, white_to_move) tuple, or None for an INVALID entry.
+    """
+    return _position(_table_masks(counts), _group_sizes(counts), index)
+
+
+def _unmoves(white, red, kings, white_to_move):
+    """
+    Yield the index of every position of the same table that leads to this one by a
+    quiet move, i.e. the position before each possible last move.
+    """
+    movers = red if white_to_move else white
+    man_unsteps = RED_MAN_UNSTEPS if white_to_move else WHITE_MAN_UNSTEPS
+    empty = ~(white | red) & FULL
+    pieces = movers
+    while pieces:
+        bit = pieces & -pieces
+        pieces ^= bit
+        for unstep in (KING_UNSTEPS if kings & bit else man_unsteps):
+            source = unstep(bit) & empty
+            if not source:
+                continue
+            moved = bit | source
+            parent_kings = kings ^ moved if kings & bit else kings
+            if white_to_move:
+                yield position_index(white, red ^ moved, parent_kings, False)
+            else:
+                yield position_index(white ^ moved, red, parent_kings, True)
+
+
+def generate_table(counts, tables):
+    """
+    Solve every position of a material signature by retrograde analysis.
+
+    Args:
+    - counts: The signature of the table.
+    - tables: Dictionary of the already solved tables, by signature, holding at
+      least the tables this one depends on.
+
+    Returns:
+    - An array('H') of encoded entries.
+    """
+    size = table_size(counts)
+    values = array('H', [INVALID]) * size
+    # Moves of each position not yet known to lose, one byte per position
+    remaining = array('B', bytes(size))
+    # Events of each distance, packed as parent index * 2 + child_won
+    events = [array('I')]
+
+    def add_event(distance, parent, child_won):
+        while len(events) <= distance:
+            events.append(array('I'))
+        events[distance].append(parent * 2 + child_won)
+
+    masks, sizes = _table_masks(counts), _group_sizes(counts)
+
+    def resolve(index, won, distance):
+        values[index] = (WIN if won else LOSS) | distance
+        for parent in _unmoves(*_position(masks, sizes, index)):
+            add_event(distance, parent, won)
+
+    lost_without_moves = []
+    # product walks the groups in index order, the last one fastest
+    for half_index, (white_men, white_kings, red_men, red_kings) in enumerate(product(*masks)):
+        white, red = white_men | white_kings, red_men | red_kings
+        if white & red or white_men & white_kings or red_men & red_kings:
+            continue
+        board = BitBoard(white, red, white_kings | red_kings)
+        for white_to_move in (False, True):
+            index = half_index * 2 + white_to_move
+            values[index] = DRAW
+            children = board.get_all_moves(WHITE if white_to_move else RED)
+            if not children:
+                lost_without_moves.append(index)
+                continue
+            remaining[index] = len(children)
+            for child in children:
+                if not child.white or not child.red:
+                    # The move took the last piece: the side now to move has lost.
+                    add_event(0, index, False)
+                    continue
+                child_counts = signature(child.white, child.red, child.kings)
+                if child_counts == counts:
+                    # Reached again from the child by _unmoves once it is resolved.
+                    continue
+                entry = tables[child_counts][position_index(child.white, child.red, child.kings, not white_to_move)]
+                if entry != DRAW:
+                    add_event(entry & DISTANCE, index, bool(entry & WIN))
+
+    for index in lost_without_moves:
+        resolve(index, False, 0)
+
+    # Handle results in order of distance so every position gets its shortest win
+    # or, when all its moves lose, its longest loss.
+    distance = 0
+    while distance < len(events):
+        for event in events[distance]:
+            parent, child_won = event >> 1, event & 1
+            if values[parent] != DRAW:
+                continue
+            if not child_won:
+                resolve(parent, True, distance + 1)
+            else:
+                remaining[parent] -= 1
+                if remaining[parent] == 0:
+                    resolve(parent, False, distance + 1)
+        events[distance] = None
+        distance += 1
+    return values
+
+
+def generate(max_pieces, path, progress=None):
+    """
+    Build the tables for 2..max_pieces pieces and write them to a file.
+
+    Args:
+    - max_pieces: The largest number of pieces to solve.
+    - path: The file to write.
+    - progress: Optional function called with a message after each table.
+    """
+    signatures = material_signatures(max_pieces)
+    tables = {}
+    offset = HEADER.size + TABLE_HEADER.size * len(signatures)
+    with open(path, 'wb') as output:
+        output.write(HEADER.pack(MAGIC, VERSION, max_pieces, len(signatures)))
+        for counts in signatures:
+            output.write(TABLE_HEADER.pack(*counts, offset, table_size(counts)))
+            offset += 2 * table_size(counts)
+        for counts in signatures:
+            tables[counts] = table = generate_table(counts, tables)
+            if sys.byteorder != 'little':
+                table = array('H', table)
+                table.byteswap()
+            table.tofile(output)
+            if progress is not None:
+                progress(f"{'/'.join(map(str, counts))} (white men/kings, red men/kings): {len(table)} entries")
+
+
+class Tablebase:
+    def __init__(self, path):
+        """
+        Open a tablebase file. The file is memory-mapped, so only the pages that
+        are probed are read from disk.
+
+        Args:
+        - path: The file written by generate.
+        """
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.max_pieces, tables = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} checkers tablebase")
+        self.offsets = {}
+        for table in range(tables):
+            *counts, offset, count = TABLE_HEADER.unpack_from(self.data, HEADER.size + TABLE_HEADER.size * table)
+            self.offsets[tuple(counts)] = offset
+
+    def probe(self, board, max_player):
+        """
+        Look up a position.
+
+        Args:
+        - board: A Board or BitBoard.
+        - max_player: True if WHITE (the maximizing player) is to move.
+
+        Returns:
+        - The raw entry (DRAW, or WIN/LOSS for the side to move combined with the
+          distance), or None if the position has too many pieces.
+        """
+        pieces = board.red_left + board.white_left
+        if pieces > self.max_pieces or not board.red_left or not board.white_left:
+            return None
+        if not isinstance(board, BitBoard):
+            board = _masks(board)
+        counts = (board.white_left - board.white_kings, board.white_kings, board.red_left - board.red_kings,
+                  board.red_kings)
+        index = position_index(board.white, board.red, board.kings, max_player)
+        return struct.unpack_from('<H', self.data, self.offsets[counts] + 2 * index)[0]
+
+    def score(self, board, max_player):
+        """
+        Get the search score of a position from WHITE's point of view.
+
+        Args:
+        - board: A Board or BitBoard.
+        - max_player: True if WHITE (the maximizing player) is to move.
+
+        Returns:
+        - WIN_SCORE less the distance for a win, its negation for a loss, 0 for a draw,
+          or None if the position is not in the tablebase.
+        """
+        entry = self.probe(board, max_player)
+        if entry is None or entry == INVALID:
+            return None
+        if entry == DRAW:
+            return 0
+        score = WIN_SCORE - (entry & DISTANCE)
+        if not entry & WIN:
+            score = -score
+        return score if max_player else -score
+
+    def close(self):
+        """
+        Release the memory map and the file.
+        """
+        self.data.close()
+        self.file.close()
+
+
+def _masks(board):
+    """
+    Get the masks of a Board without building its skip list like BitBoard.from_board.
+    """
+    kings = 0
+    for color in (WHITE, RED):
+        for piece in board.pieces(color):
+            if piece.king:
+                kings |= 1 << row_col_to_square(piece.row, piece.col)
+    return BitBoard(board.white_mask, board.red_mask, kings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate an endgame tablebase.")
+    parser.add_argument('--pieces', type=int, default=4, help='largest number of pieces to solve')
+    parser.add_argument('--output', default='endgame.tb', help='file to write')
+    options = parser.parse_args(argv)
+    generate(options.pieces, options.output, progress=lambda message: print(message, file=sys.stderr))
+
+
+if __name__ == '__main__':
+    main()
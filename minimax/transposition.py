@@ -0,0 +1,106 @@
+from collections import namedtuple
+
+# Bound types: the stored score is exact, a lower bound (fail high) or an upper bound (fail low).
+EXACT, LOWER, UPPER = 'exact', 'lower', 'upper'
+
+TTEntry = namedtuple('TTEntry', ['key', 'depth', 'score', 'bound', 'best_move'])
+
+
+def replace_always(old, new):
+    """Replacement policy: the newest result always wins the slot."""
+    return True
+
+
+def replace_depth_preferred(old, new):
+    """Replacement policy: keep the deeper search, but always refresh the same position."""
+    return old.key == new.key or new.depth >= old.depth
+
+
+REPLACEMENT_POLICIES = {
+    'always': replace_always,
+    'depth': replace_depth_preferred,
+}
+
+
+class TranspositionTable:
+    def __init__(self, size=1 << 16, replacement='depth'):
+        """
+        Initialize a fixed-size transposition table.
+
+        Args:
+        - size: Number of slots. Memory use is bounded by this, one entry per slot.
+        - replacement: Name of a policy in REPLACEMENT_POLICIES, or a callable
+          taking (old_entry, new_entry) and returning True to overwrite.
+        """
+        self.size = size
+        self.replacement = REPLACEMENT_POLICIES[replacement] if isinstance(replacement, str) else replacement
+        self.entries = [None] * size
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def probe(self, key):
+        """
+        Look up a position.
+
+        A probe is a hit when its slot holds this position, otherwise a miss. A miss
+        on a slot holding another position also counts as a collision.
+
+        Args:
+        - key: The Zobrist key of the position.
+
+        Returns:
+        - The TTEntry for the position, or None.
+        """
+        entry = self.entries[key % self.size]
+        if entry is not None and entry.key == key:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        if entry is not None:
+            self.collisions += 1
+        return None
+
+    def store(self, key, depth, score, bound, best_move):
+        """
+        Store a search result, subject to the replacement policy.
+
+        Args:
+        - key: The Zobrist key of the position.
+        - depth: The remaining depth the position was searched to.
+        - score: The score found.
+        - bound: EXACT, LOWER or UPPER.
+        - best_move: The best or refuting move as ((row, col), (row, col)), or None.
+        """
+        index = key % self.size
+        new = TTEntry(key, depth, score, bound, best_move)
+        old = self.entries[index]
+        if old is None or self.replacement(old, new):
+            self.entries[index] = new
+            self.stores += 1
+
+    def clear(self):
+        """
+        Empty the table and reset the counters.
+        """
+        self.entries = [None] * self.size
+        self.hits = self.misses = self.collisions = self.stores = 0
+
+    def stats(self):
+        """
+        Get the usage counters, e.g. to size the table for a deployment.
+
+        Returns:
+        - A dictionary of counters and the fill rate.
+        """
+        used = sum(entry is not None for entry in self.entries)
+        return {
+            'size': self.size,
+            'used': used,
+            'fill': used / self.size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'collisions': self.collisions,
+            'stores': self.stores,
+        }
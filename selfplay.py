@@ -0,0 +1,172 @@
+"""
+Play engine-vs-engine games in parallel and stream them as JSON Lines.
+
+Each output line is one finished game:
+    {"game": 0, "result": "WHITE", "plies": 57, "moves": [{"color": "RED", "from": [5, 0], "to": [4, 1],
+     "captured": [], "score": 0, "depth": 6, "nodes": 5120, "time_ms": 101.3}, ...]}
+
+Scores are from WHITE's point of view. A won position, which the search scores
+as infinite, is written as +/-WIN_SCORE of minimax.tablebase, so every line is
+strict JSON.
+
+With --stats every move also carries the SearchStats.as_dict() of its search.
+With --record the games are also appended to a compact binary archive, see
+utils/record.py.
+
+Example, run from the repository root:
+    python selfplay.py --games 100 --workers 8 --time-budget 200 > games.jsonl
+"""
+import argparse
+import json
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from math import isinf
+from time import perf_counter
+from engine import Board, Engine, LEVELS, RED, WHITE, Quiescence, get_all_valid_moves
+from minimax.tablebase import WIN_SCORE
+from utils.record import RecordWriter
+
+COLOR_NAMES = {RED: "RED", WHITE: "WHITE"}
+
+
+def play_game(index, options):
+    """
+    Play one engine-vs-engine game.
+
+    The first options.random_plies plies are random, seeded by the game index, so the
+    games of a batch differ from each other.
+
+    Args:
+    - index: The game number.
+    - options: The parsed command-line options.
+
+    Returns:
+    - The game record as a dictionary.
+    """
+    rng = random.Random(options.seed + index)
+    engines = {color: Engine(level, options.time_budget, options.depth, tablebase=options.tablebase,
+                             book=options.book, batch=options.batch or None, cache=options.cache,
+                             quiescence=Quiescence(options.quiescence) if options.quiescence else None,
+                             pvs=options.pvs, aspiration=options.aspiration)
+               for color, level in ((WHITE, options.white_level), (RED, options.red_level))}
+    try:
+        moves, result = play_moves(engines, rng, options)
+    finally:
+        for engine in engines.values():
+            engine.close()
+    return {"game": index, "result": result, "plies": len(moves), "moves": moves}
+
+
+def play_moves(engines, rng, options):
+    """
+    Play the moves of a game.
+
+    Args:
+    - engines: The Engine of each colour.
+    - rng: The random generator of the opening plies.
+    - options: The parsed command-line options.
+
+    Returns:
+    - The list of move records and the result.
+    """
+    board = Board()
+    board.draw_plies = options.draw_plies or None
+    color = RED
+    moves = []
+    result = "draw"
+    while len(moves) < options.max_plies:
+        over = board.result(color)
+        if over is not None:
+            result = over
+            break
+
+        start = perf_counter()
+        search = None
+        if len(moves) < options.random_plies:
+            legal = get_all_valid_moves(board, color)
+            move = rng.choice(legal) if legal else None
+            score, depth, nodes = None, 0, 0
+        else:
+            search = engines[color].search(board, color)
+            move, score, depth, nodes = search.move, search.value, search.depth, search.nodes
+            if isinf(score):
+                # JSON has no infinity: a won or lost position scores like a tablebase win
+                score = WIN_SCORE if score > 0 else -WIN_SCORE
+        elapsed = (perf_counter() - start) * 1000
+
+        if move is None:
+            # A side that cannot move loses.
+            result = COLOR_NAMES[WHITE if color == RED else RED]
+            break
+        piece, destination, skip = move
+        moves.append({
+            "color": COLOR_NAMES[color],
+            "from": [piece.row, piece.col],
+            "to": list(destination),
+            "captured": [[captured.row, captured.col] for captured in skip],
+            "score": score,
+            "depth": depth,
+            "nodes": nodes,
+            "time_ms": round(elapsed, 3),
+        })
+        if options.stats and search is not None:
+            moves[-1]["stats"] = search.stats.as_dict()
+        board.make_move(piece, destination[0], destination[1], skip)
+        color = WHITE if color == RED else RED
+
+    return moves, result
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--games", type=int, default=10, help="number of games to play")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--time-budget", type=float, default=100, help="thinking time per move in milliseconds")
+    parser.add_argument("--depth", type=int, default=None, help="fixed search depth instead of a time budget")
+    parser.add_argument("--white-level", choices=LEVELS, default="Advance Level")
+    parser.add_argument("--red-level", choices=LEVELS, default="Advance Level")
+    parser.add_argument("--random-plies", type=int, default=4, help="random opening plies per game")
+    parser.add_argument("--max-plies", type=int, default=200, help="plies after which a game is a draw")
+    parser.add_argument("--draw-plies", type=int, default=Board.draw_plies,
+                        help="plies without a capture or a man moving after which a game is a draw, 0 for no limit")
+    parser.add_argument("--tablebase", default=None, help="endgame tablebase file to probe")
+    parser.add_argument("--book", default=None, help="opening book file to play from")
+    parser.add_argument("--batch", action="store_true", help="score leaves in NumPy batches")
+    parser.add_argument("--cache", default=None, help="search cache file shared by the workers")
+    parser.add_argument("--quiescence", type=int, default=0, metavar="NODES",
+                        help="search captures past the depth horizon, with this node budget per horizon node")
+    parser.add_argument("--pvs", action="store_true", help="use principal variation search")
+    parser.add_argument("--aspiration", type=float, default=None, metavar="WIDTH",
+                        help="half-width of the aspiration window around the previous iteration's score")
+    parser.add_argument("--stats", action="store_true", help="add the search statistics of every move")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random opening plies")
+    parser.add_argument("--output", default="-", help="JSON Lines file to write, '-' for stdout")
+    parser.add_argument("--record", default=None, help="game archive to append the games to")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    output = sys.stdout if options.output == "-" else open(options.output, "w")
+    record = RecordWriter(options.record) if options.record else None
+    try:
+        with ProcessPoolExecutor(max_workers=options.workers) as executor:
+            futures = [executor.submit(play_game, index, options) for index in range(options.games)]
+            for future in as_completed(futures):
+                game = future.result()
+                output.write(json.dumps(game, allow_nan=False) + "\n")
+                output.flush()
+                if record is not None:
+                    record.write([(tuple(move["from"]), tuple(move["to"])) for move in game["moves"]],
+                                 game["result"], {"game": game["game"], "white_level": options.white_level,
+                                                  "red_level": options.red_level})
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if record is not None:
+            record.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,327 @@
+from .parameters import ROWS, COLS, RED, WHITE
+from .board import Board
+from .piece import Piece
+
+# The 32 playable (dark) squares are numbered row by row, so the piece on
+# (row, col) lives at bit 4 * row + col // 2 of a 32-bit mask.
+SQUARES = 32
+FULL = (1 << SQUARES) - 1
+
+ROW_MASKS = [0xF << (4 * row) for row in range(ROWS)]
+EVEN_ROWS = sum(ROW_MASKS[0::2])
+ODD_ROWS = sum(ROW_MASKS[1::2])
+TOP_ROW = ROW_MASKS[0]
+BOTTOM_ROW = ROW_MASKS[ROWS - 1]
+PROMOTION_ROWS = TOP_ROW | BOTTOM_ROW
+
+# First and last playable square of every row.
+LEFT_EDGE = 0x11111111
+RIGHT_EDGE = 0x88888888
+
+
+def square_to_row_col(square):
+    """
+    Convert a square index (0-31) to board coordinates.
+
+    Args:
+    - square: The square index.
+
+    Returns:
+    - A (row, col) tuple.
+    """
+    row = square // 4
+    return row, 2 * (square % 4) + (row + 1) % 2
+
+
+def row_col_to_square(row, col):
+    """
+    Convert board coordinates of a dark square to its square index.
+
+    Args:
+    - row: The row on the board.
+    - col: The column on the board.
+
+    Returns:
+    - The square index (0-31).
+    """
+    return 4 * row + col // 2
+
+
+def down_left(mask):
+    """Shift every square in the mask one step towards row 7, column - 1."""
+    return (((mask & EVEN_ROWS) << 4) | ((mask & ODD_ROWS & ~LEFT_EDGE) << 3)) & FULL
+
+
+def down_right(mask):
+    """Shift every square in the mask one step towards row 7, column + 1."""
+    return (((mask & EVEN_ROWS & ~RIGHT_EDGE) << 5) | ((mask & ODD_ROWS) << 4)) & FULL
+
+
+def up_left(mask):
+    """Shift every square in the mask one step towards row 0, column - 1."""
+    return ((mask & EVEN_ROWS) >> 4) | ((mask & ODD_ROWS & ~LEFT_EDGE) >> 5)
+
+
+def up_right(mask):
+    """Shift every square in the mask one step towards row 0, column + 1."""
+    return ((mask & EVEN_ROWS & ~RIGHT_EDGE) >> 3) | ((mask & ODD_ROWS) >> 4)
+
+
+# (left shift, right shift, rows a continuation jump may not land on)
+UP = (up_left, up_right, TOP_ROW)
+DOWN = (down_left, down_right, 0)
+
+
+class BitBoard:
+    """
+    Compact board made of three 32-bit masks: white men, red men and kings.
+
+    Move generation follows Board.get_valid_moves exactly, so the two
+    representations produce the same moves in the same order and can be
+    swapped in the search. In particular a jump chain keeps its vertical
+    direction, a continuation jump towards row 0 cannot land on row 0, and a
+    multi-jump records the pieces taken by its last two hops only.
+    """
+    __slots__ = ('white', 'red', 'kings', 'skipped', 'new_step')
+
+    def __init__(self, white, red, kings, skipped=0, new_step=None):
+        """
+        Initialize a BitBoard from its masks.
+
+        Args:
+        - white: Mask of the white pieces.
+        - red: Mask of the red pieces.
+        - kings: Mask of the kings of either colour.
+        - skipped: Mask of the pieces captured by the last move.
+        - new_step: The (row, col) destination of the last move.
+        """
+        self.white = white
+        self.red = red
+        self.kings = kings
+        self.skipped = skipped
+        self.new_step = new_step
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Build a BitBoard from a Board.
+
+        Args:
+        - board: The Board to convert.
+
+        Returns:
+        - The equivalent BitBoard.
+        """
+        white = red = kings = skipped = 0
+        for row in board.board:
+            for piece in row:
+                if piece == 0:
+                    continue
+                bit = 1 << row_col_to_square(piece.row, piece.col)
+                if piece.color == WHITE:
+                    white |= bit
+                else:
+                    red |= bit
+                if piece.king:
+                    kings |= bit
+        for piece in board.skip or []:
+            skipped |= 1 << row_col_to_square(piece.row, piece.col)
+        return cls(white, red, kings, skipped, board.new_step)
+
+    def to_board(self):
+        """
+        Build a Board, e.g. for the pygame UI, from this BitBoard.
+
+        Returns:
+        - The equivalent Board.
+        """
+        board = Board()
+        board.board = [[0] * COLS for _ in range(ROWS)]
+        for mask, color in ((self.white, WHITE), (self.red, RED)):
+            for square in _squares(mask):
+                row, col = square_to_row_col(square)
+                piece = Piece(row, col, color)
+                if self.kings >> square & 1:
+                    piece.make_king()
+                board.board[row][col] = piece
+
+        board.red_left = self.red_left
+        board.white_left = self.white_left
+        board.red_kings = self.red_kings
+        board.white_kings = self.white_kings
+        board.hash = board.compute_hash()
+        board.tempo, board.back_rank, board.piece_square = board.compute_positional()
+        board.red_mask, board.white_mask = board.compute_masks()
+        board.new_step = self.new_step
+        board.skip = None
+        if self.new_step is not None:
+            # The captured pieces belong to the side that did not move last.
+            mover = board.get_piece(*self.new_step)
+            captured = RED if mover != 0 and mover.color == WHITE else WHITE
+            board.skip = [Piece(*square_to_row_col(square), captured) for square in _squares(self.skipped)]
+        return board
+
+    @property
+    def red_left(self):
+        return self.red.bit_count()
+
+    @property
+    def white_left(self):
+        return self.white.bit_count()
+
+    @property
+    def red_kings(self):
+        return (self.red & self.kings).bit_count()
+
+    @property
+    def white_kings(self):
+        return (self.white & self.kings).bit_count()
+
+    def evaluate_basic(self):
+        """
+        Evaluation function for basic level, same as Board.evaluate_basic.
+        """
+        return self.white.bit_count() - self.red.bit_count()
+
+    def evaluate_intermediate(self):
+        """
+        Evaluation function for intermediate level, same as Board.evaluate_intermediate.
+        """
+        return (self.white_kings - self.red_kings) + self.evaluate_basic() + min(self.skipped.bit_count(), 2)
+
+    def evaluate_advanced(self):
+        """
+        Evaluation function for advanced level, same as Board.evaluate_advanced.
+        """
+        return ((self.white_kings * 0.5 - self.red_kings * 0.5) + self.evaluate_basic()
+                + min(self.skipped.bit_count(), 2))
+
+    def winner(self):
+        """
+        Determine the winner of the game.
+
+        Returns:
+        - The winner's message or None if the game is ongoing.
+        """
+        if not self.red:
+            return "WHITE is Winner"
+        elif not self.white:
+            return "RED is Winner"
+        return None
+
+    def get_valid_moves(self, square):
+        """
+        Get all valid moves for the piece on a square.
+
+        Args:
+        - square: The square index of the piece.
+
+        Returns:
+        - A dictionary mapping destination bits to the mask of captured pieces,
+          in the same order as Board.get_valid_moves.
+        """
+        bit = 1 << square
+        if self.white & bit:
+            opponent = self.red
+            directions = (UP, DOWN) if self.kings & bit else (DOWN,)
+        else:
+            opponent = self.white
+            directions = (UP, DOWN) if self.kings & bit else (UP,)
+        empty = ~(self.white | self.red) & FULL
+
+        moves = {}
+        for left, right, blocked in directions:
+            for step in (left, right):
+                target = step(bit)
+                if target & empty:
+                    moves[target] = 0
+                elif target & opponent:
+                    landing = step(target)
+                    if landing & empty:
+                        self._add_jumps(moves, landing, target, 0, left, right, blocked, opponent, empty)
+        return moves
+
+    @staticmethod
+    def _add_jumps(moves, landing, captured, previous, left, right, blocked, opponent, empty):
+        """
+        Add a jump and every continuation of it, depth first, without recursion.
+
+        Args:
+        - moves: The dictionary of moves being built.
+        - landing: Bit of the square the first jump lands on.
+        - captured: Bit of the piece taken by the first jump.
+        - previous: Bit of the piece taken by the hop before it, if any.
+        - left: Shift towards the left in the jump's vertical direction.
+        - right: Shift towards the right in the jump's vertical direction.
+        - blocked: Rows a continuation jump may not land on.
+        - opponent: Mask of the opponent pieces.
+        - empty: Mask of the empty squares.
+        """
+        stack = [(landing, captured, previous)]
+        while stack:
+            landing, captured, previous = stack.pop()
+            moves[landing] = captured | previous
+            # Push right before left so the left branch is explored first.
+            for step in (right, left):
+                target = step(landing)
+                if target & opponent:
+                    next_landing = step(target) & ~blocked
+                    if next_landing & empty:
+                        stack.append((next_landing, target, captured))
+
+    def move(self, square, target, captured):
+        """
+        Return the position after moving the piece on a square.
+
+        Args:
+        - square: The square index of the moving piece.
+        - target: Bit of the destination square.
+        - captured: Mask of the pieces taken by the move.
+
+        Returns:
+        - A new BitBoard.
+        """
+        bit = 1 << square
+        white, red, kings = self.white, self.red, self.kings
+        if kings & bit:
+            kings ^= bit | target
+        if white & bit:
+            white ^= bit | target
+            red &= ~captured
+        else:
+            red ^= bit | target
+            white &= ~captured
+        if target & PROMOTION_ROWS:
+            kings |= target
+        kings &= ~captured
+        return BitBoard(white, red, kings, captured,
+                        square_to_row_col(target.bit_length() - 1))
+
+    def get_all_moves(self, color):
+        """
+        Generate every position reachable by a move of the given colour.
+
+        Args:
+        - color: The colour of the side to move.
+
+        Returns:
+        - A list of BitBoards, in the same order as minimax.algorithm.get_all_moves.
+        """
+        positions = []
+        for square in _squares(self.white if color == WHITE else self.red):
+            for target, captured in self.get_valid_moves(square).items():
+                positions.append(self.move(square, target, captured))
+        return positions
+
+
+def _squares(mask):
+    """
+    Yield the indices of the set bits of a mask, lowest first.
+
+    Args:
+    - mask: The mask to walk.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
@@ -1,8 +1,67 @@
-import pygame
+from collections import namedtuple
 from .parameters import BLACK, ROWS, RED, SQUARE_SIZE, COLS, WHITE, GREY
 from .piece import Piece
+from .movetables import COORDINATES, NEIGHBOURS, JUMPS, CHAIN_JUMPS, UP, DOWN, ONWARD, UP_STEPS, DOWN_STEPS
+from .positional import TERMS
+from .zobrist import piece_key
+
+# Everything Board.unmake_move needs to take back a move made with Board.make_move.
+Undo = namedtuple('Undo', ['piece', 'origin', 'captured', 'promoted', 'counters', 'hash', 'skip', 'new_step',
+                           'history', 'history_length'])
+
+
+def can_move(color, own, other, kings):
+    """
+    Check whether a side has a legal move, from occupancy masks.
+
+    Args:
+    - color: The side, RED or WHITE.
+    - own: Mask of its pieces.
+    - other: Mask of the opponent's pieces.
+    - kings: Mask of its kings.
+
+    Returns:
+    - True if one of its pieces has a simple move or a first jump.
+    """
+    occupied = own | other
+    forward = UP_STEPS if color == RED else DOWN_STEPS
+    # Simple moves first, one mask test per piece
+    pieces = own
+    while pieces:
+        low = pieces & -pieces
+        pieces ^= low
+        square = low.bit_length() - 1
+        steps = UP_STEPS[square] | DOWN_STEPS[square] if kings & low else forward[square]
+        if steps & ~occupied:
+            return True
+    while own:
+        low = own & -own
+        own ^= low
+        square = low.bit_length() - 1
+        if kings & low:
+            directions = UP + DOWN
+        else:
+            directions = UP if color == RED else DOWN
+        for direction in directions:
+            neighbour = NEIGHBOURS[square][direction]
+            if neighbour is not None and other >> neighbour & 1:
+                landing = JUMPS[square][direction]
+                if landing is not None and not occupied >> landing & 1:
+                    return True
+    return False
+
 
 class Board:
+    # Check the incremental hash, counters, positional accumulators and occupancy masks
+    # against a full recompute after every make_move and unmake_move. Slow; for debugging only.
+    debug = False
+    # Plies in a row without a capture or a man moving after which the game is a
+    # draw, None for no limit. Set on an instance to change it for one game.
+    draw_plies = 80
+    # Occurrences of a position, with the same side to move, that make the game a
+    # draw, None to ignore repetitions.
+    draw_repetitions = 3
+
     def __init__(self):
         """
         Initialize the game board with pieces and their counts.
@@ -14,6 +73,18 @@ class Board:
         self.white_kings = 0
         self.new_step = None
         self.skip = None
+        self.hash = 0
+        # Positional accumulators kept up to date by move and remove, see utils.positional.
+        self.tempo = 0
+        self.back_rank = 0
+        self.piece_square = 0
+        # Occupancy masks of each colour, bit 4 * row + col // 2 set for every piece,
+        # kept up to date by move and remove like the counters.
+        self.red_mask = 0
+        self.white_mask = 0
+        # Hashes of the positions since the last capture or man move, oldest first.
+        # Only these can repeat: a capture or a man's move can never be taken back.
+        self.history = []
         self.create_board()
 
     def draw_squares(self, win):
@@ -23,6 +94,8 @@ class Board:
         Args:
         - win: The game window.
         """
+        import pygame
+
         win.fill(BLACK)
         for row in range(ROWS):
             for col in range(row % 2, COLS, 2):
@@ -69,12 +142,60 @@ class Board:
         Returns:
         - List of pieces of the specified color.
         """
-        pieces = []
-        for row in self.board:
-            for piece in row:
-                if piece != 0 and piece.color == color:
-                    pieces.append(piece)
-        return pieces
+        return list(self.pieces(color))
+
+    def pieces(self, color):
+        """
+        Go through the pieces of a color using its occupancy mask, without scanning the board.
+
+        Args:
+        - color: The color of the pieces.
+
+        Yields:
+        - The pieces in row-major order, like get_all_pieces. The pieces are those on
+          the board when iteration starts.
+        """
+        mask = self.red_mask if color == RED else self.white_mask
+        board = self.board
+        while mask:
+            low = mask & -mask
+            mask ^= low
+            row, col = COORDINATES[low.bit_length() - 1]
+            yield board[row][col]
+
+    def has_moves(self, color):
+        """
+        Check whether a color has any legal move, stopping at the first one found.
+
+        A piece can move if it has a simple move or a first jump, so jump chains are
+        not followed and no move dictionary is built.
+
+        Args:
+        - color: The color to check.
+
+        Returns:
+        - True if get_valid_moves would find a move for some piece of the color.
+        """
+        if color == RED:
+            return can_move(RED, self.red_mask, self.white_mask, self.king_mask(RED))
+        return can_move(WHITE, self.white_mask, self.red_mask, self.king_mask(WHITE))
+
+    def king_mask(self, color):
+        """
+        Get the occupancy mask of the kings of a color.
+
+        Args:
+        - color: The color of the kings.
+
+        Returns:
+        - The mask, bit 4 * row + col // 2 set for every king.
+        """
+        mask = 0
+        if self.red_kings if color == RED else self.white_kings:
+            for piece in self.pieces(color):
+                if piece.king:
+                    mask |= 1 << (4 * piece.row + piece.col // 2)
+        return mask
 
     def move(self, piece, row, col):
         """
@@ -85,16 +206,86 @@ class Board:
         - row: The destination row.
         - col: The destination column.
         """
+        if piece.king:
+            self.history.append(self.hash)
+        else:
+            self.history = []
+        self.hash ^= piece_key(piece.row, piece.col, piece.color, piece.king)
+        old_tempo, old_back_rank, old_piece_square = TERMS[(piece.color, piece.king)][piece.row][piece.col]
         self.board[piece.row][piece.col], self.board[row][col] = self.board[row][col], self.board[piece.row][piece.col]
+        moved = 1 << (4 * piece.row + piece.col // 2) | 1 << (4 * row + col // 2)
+        if piece.color == RED:
+            self.red_mask ^= moved
+        else:
+            self.white_mask ^= moved
         piece.move(row, col)
 
-        if row == ROWS - 1 or row == 0:
+        if (row == ROWS - 1 or row == 0) and not piece.king:
             piece.make_king()
             if piece.color == WHITE:
                 self.white_kings += 1
             else:
                 self.red_kings += 1
+        self.hash ^= piece_key(row, col, piece.color, piece.king)
+        tempo, back_rank, piece_square = TERMS[(piece.color, piece.king)][row][col]
+        self.tempo += tempo - old_tempo
+        self.back_rank += back_rank - old_back_rank
+        self.piece_square += piece_square - old_piece_square
+
+    def make_move(self, piece, row, col, skip):
+        """
+        Apply a move in place, the same way minimax.algorithm.simulate_move does.
+
+        Args:
+        - piece: The piece to move.
+        - row: The destination row.
+        - col: The destination column.
+        - skip: List of pieces captured by the move.
+
+        Returns:
+        - An Undo record to pass to unmake_move.
+        """
+        origin = (piece.row, piece.col)
+        was_king = piece.king
+        counters = (self.red_left, self.white_left, self.red_kings, self.white_kings, self.tempo, self.back_rank,
+                    self.piece_square, self.red_mask, self.white_mask)
+        undo_hash, undo_skip, undo_new_step = self.hash, self.skip, self.new_step
+        history, history_length = self.history, len(self.history)
+
+        self.move(piece, row, col)
+        self.skip = skip
+        self.new_step = (row, col)
+        if skip:
+            self.remove(skip)
+        if self.debug:
+            self.check_incremental()
+        return Undo(piece, origin, skip, piece.king and not was_king, counters, undo_hash, undo_skip, undo_new_step,
+                    history, history_length)
+
+    def unmake_move(self, undo):
+        """
+        Take back a move applied with make_move.
 
+        Args:
+        - undo: The Undo record returned by make_move.
+        """
+        piece = undo.piece
+        self.board[piece.row][piece.col] = 0
+        self.board[undo.origin[0]][undo.origin[1]] = piece
+        piece.move(*undo.origin)
+        if undo.promoted:
+            piece.king = False
+        for captured in undo.captured:
+            self.board[captured.row][captured.col] = captured
+        (self.red_left, self.white_left, self.red_kings, self.white_kings, self.tempo, self.back_rank,
+         self.piece_square, self.red_mask, self.white_mask) = undo.counters
+        self.hash = undo.hash
+        self.skip = undo.skip
+        self.new_step = undo.new_step
+        self.history = undo.history
+        del self.history[undo.history_length:]
+        if self.debug:
+            self.check_incremental()
 
     def get_piece(self, row, col):
         """
@@ -125,6 +316,88 @@ class Board:
                         self.board[row].append(0)
                 else:
                     self.board[row].append(0)
+        self.hash = self.compute_hash()
+        self.tempo, self.back_rank, self.piece_square = self.compute_positional()
+        self.red_mask, self.white_mask = self.compute_masks()
+
+    def compute_hash(self):
+        """
+        Compute the Zobrist hash of the pieces from scratch.
+
+        Board.move and Board.remove keep self.hash up to date incrementally; this is
+        for boards built or edited some other way.
+
+        Returns:
+        - The 64-bit hash of the board.
+        """
+        board_hash = 0
+        for row in self.board:
+            for piece in row:
+                if piece != 0:
+                    board_hash ^= piece_key(piece.row, piece.col, piece.color, piece.king)
+        return board_hash
+
+    def compute_positional(self):
+        """
+        Compute the positional accumulators from scratch.
+
+        Like the hash, Board.move and Board.remove keep them up to date
+        incrementally; this is for boards built or edited some other way.
+
+        Returns:
+        - A (tempo, back_rank, piece_square) tuple, from WHITE's point of view.
+        """
+        tempo = back_rank = piece_square = 0
+        for row in self.board:
+            for piece in row:
+                if piece != 0:
+                    terms = TERMS[(piece.color, piece.king)][piece.row][piece.col]
+                    tempo += terms[0]
+                    back_rank += terms[1]
+                    piece_square += terms[2]
+        return tempo, back_rank, piece_square
+
+    def compute_masks(self):
+        """
+        Compute the occupancy masks from scratch.
+
+        Like the hash, Board.move and Board.remove keep them up to date
+        incrementally; this is for boards built or edited some other way.
+
+        Returns:
+        - A (red_mask, white_mask) tuple.
+        """
+        red_mask = white_mask = 0
+        for row in self.board:
+            for piece in row:
+                if piece != 0:
+                    if piece.color == RED:
+                        red_mask |= 1 << (4 * piece.row + piece.col // 2)
+                    else:
+                        white_mask |= 1 << (4 * piece.row + piece.col // 2)
+        return red_mask, white_mask
+
+    def check_incremental(self):
+        """
+        Check the incrementally maintained hash, counters, positional
+        accumulators and occupancy masks against a full recompute.
+
+        Raises:
+        - AssertionError naming the first value that differs.
+        """
+        pieces = [piece for row in self.board for piece in row if piece != 0]
+        expected = {
+            'hash': self.compute_hash(),
+            'red_left': sum(piece.color == RED for piece in pieces),
+            'white_left': sum(piece.color == WHITE for piece in pieces),
+            'red_kings': sum(piece.color == RED and piece.king for piece in pieces),
+            'white_kings': sum(piece.color == WHITE and piece.king for piece in pieces),
+        }
+        expected['tempo'], expected['back_rank'], expected['piece_square'] = self.compute_positional()
+        expected['red_mask'], expected['white_mask'] = self.compute_masks()
+        for name, value in expected.items():
+            if getattr(self, name) != value:
+                raise AssertionError(f"incremental {name} is {getattr(self, name)}, recomputed {value}")
 
     def draw(self, win):
         """
@@ -147,13 +420,26 @@ class Board:
         Args:
         - pieces: List of pieces to be removed.
         """
+        if pieces:
+            self.history = []
         for piece in pieces:
             self.board[piece.row][piece.col] = 0
             if piece != 0:
+                self.hash ^= piece_key(piece.row, piece.col, piece.color, piece.king)
+                tempo, back_rank, piece_square = TERMS[(piece.color, piece.king)][piece.row][piece.col]
+                self.tempo -= tempo
+                self.back_rank -= back_rank
+                self.piece_square -= piece_square
                 if piece.color == RED:
+                    self.red_mask &= ~(1 << (4 * piece.row + piece.col // 2))
                     self.red_left -= 1
+                    if piece.king:
+                        self.red_kings -= 1
                 else:
+                    self.white_mask &= ~(1 << (4 * piece.row + piece.col // 2))
                     self.white_left -= 1
+                    if piece.king:
+                        self.white_kings -= 1
 
     def winner(self):
         """
@@ -168,118 +454,106 @@ class Board:
             return "RED is Winner"
         return None
 
-    def get_valid_moves(self, piece):
+    def repetitions(self):
         """
-        Get all valid moves for a given piece.
-
-        Args:
-        - piece: The selected piece.
+        Count the earlier occurrences of the position with the same side to move.
 
         Returns:
-        - A dictionary of valid moves.
+        - The number of times the position was reached before, since the last
+          capture or man move.
         """
-        moves = {}
-        left = piece.col - 1
-        right = piece.col + 1
-        row = piece.row
-
-        if piece.color == RED or piece.king:
-            moves.update(self._traverse_left(row - 1, max(row - 3, -1), -1, piece.color, left))
-            moves.update(self._traverse_right(row - 1, max(row - 3, -1), -1, piece.color, right))
-        if piece.color == WHITE or piece.king:
-            moves.update(self._traverse_left(row + 1, min(row + 3, ROWS), 1, piece.color, left))
-            moves.update(self._traverse_right(row + 1, min(row + 3, ROWS), 1, piece.color, right))
-        return moves
+        return self.history[-4::-2].count(self.hash)
 
-    def _traverse_left(self, start, stop, step, color, left, skipped=[]):
+    def is_draw(self):
         """
-        Traverse left to find valid moves.
+        Check the draw rules: draw_plies plies in a row without a capture or a man
+        moving, or the position reached draw_repetitions times.
 
-        Args:
-        - start: The starting row.
-        - stop: The stopping row.
-        - step: The step direction.
-        - color: The color of the pieces.
-        - left: The starting column.
-        - skipped: List of skipped pieces.
+        Cheap enough for every search node: the history only goes back to the last
+        capture or man move.
 
         Returns:
-        - A dictionary of valid moves.
+        - True if the game is drawn.
         """
-        moves = {}
-        last = []
-        for r in range(start, stop, step):
-            if left < 0:
-                break
+        plies = len(self.history)
+        if self.draw_plies is not None and plies >= self.draw_plies:
+            return True
+        return self.draw_repetitions is not None and plies >= 4 and self.repetitions() + 1 >= self.draw_repetitions
 
-            current = self.board[r][left]
-            if current == 0:
-                if skipped and not last:
-                    break
-                elif skipped:
-                    moves[(r, left)] = last + skipped
-                else:
-                    moves[(r, left)] = last
+    def result(self, color):
+        """
+        Determine whether the game is over, with a side to move.
 
-                if last:
-                    if step == -1:
-                        row = max(r - 3, 0)
-                    else:
-                        row = min(r + 3, ROWS)
-                    moves.update(self._traverse_left(r + step, row, step, color, left - 1, skipped=last))
-                    moves.update(self._traverse_right(r + step, row, step, color, left + 1, skipped=last))
-                break
-            elif current.color == color:
-                break
-            else:
-                last = [current]
+        A side without pieces or without a legal move loses; otherwise the draw rules
+        of is_draw apply.
 
-            left -= 1
+        Args:
+        - color: The side to move.
 
-        return moves
+        Returns:
+        - 'RED' or 'WHITE' for the winner, 'draw', or None if the game is ongoing.
+        """
+        if self.red_left <= 0:
+            return 'WHITE'
+        elif self.white_left <= 0:
+            return 'RED'
+        elif not self.has_moves(color):
+            return 'WHITE' if color == RED else 'RED'
+        elif self.is_draw():
+            return 'draw'
+        return None
 
-    def _traverse_right(self, start, stop, step, color, right, skipped=[]):
+    def get_valid_moves(self, piece):
         """
-        Traverse right to find valid moves.
+        Get all valid moves for a given piece.
+
+        Walks the precomputed tables of utils.movetables, following jump chains with
+        an explicit stack: the moves come out in the order of a depth-first search
+        trying up before down and left before right.
 
         Args:
-        - start: The starting row.
-        - stop: The stopping row.
-        - step: The step direction.
-        - color: The color of the pieces.
-        - right: The starting column.
-        - skipped: List of skipped pieces.
+        - piece: The selected piece.
 
         Returns:
-        - A dictionary of valid moves.
+        - A dictionary mapping each destination (row, col) to the list of pieces
+          captured on the way: the last two jumped pieces, latest first.
         """
         moves = {}
-        last = []
-        for r in range(start, stop, step):
-            if right >= COLS:
-                break
-            current = self.board[r][right]
+        board = self.board
+        color = piece.color
+        directions = ()
+        if color == RED or piece.king:
+            directions += UP
+        if color == WHITE or piece.king:
+            directions += DOWN
+
+        # (square, direction, piece jumped to reach the square or None at the start)
+        start = 4 * piece.row + piece.col // 2
+        stack = [(start, direction, None) for direction in reversed(directions)]
+        while stack:
+            square, direction, previous = stack.pop()
+            neighbour = NEIGHBOURS[square][direction]
+            if neighbour is None:
+                continue
+            row, col = COORDINATES[neighbour]
+            current = board[row][col]
             if current == 0:
-                if skipped and not last:
-                    break
-                elif skipped:
-                    moves[(r, right)] = last + skipped
-                else:
-                    moves[(r, right)] = last
-
-                if last:
-                    if step == -1:
-                        row = max(r - 3, 0)
-                    else:
-                        row = min(r + 3, ROWS)
-                    moves.update(self._traverse_left(r + step, row, step, color, right - 1, skipped=last))
-                    moves.update(self._traverse_right(r + step, row, step, color, right + 1, skipped=last))
-                break
-            elif current.color == color:
-                break
-            else:
-                last = [current]
-
-            right += 1
+                # A simple move, only allowed before any jump
+                if previous is None:
+                    moves[(row, col)] = []
+                continue
+            if current.color == color:
+                continue
+
+            landing = (JUMPS if previous is None else CHAIN_JUMPS)[square][direction]
+            if landing is None:
+                continue
+            destination = COORDINATES[landing]
+            if board[destination[0]][destination[1]] != 0:
+                continue
+            moves[destination] = [current] if previous is None else [current, previous]
+            left, right = ONWARD[direction]
+            stack.append((landing, right, current))
+            stack.append((landing, left, current))
 
         return moves
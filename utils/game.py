@@ -1,6 +1,8 @@
 import pygame
 from .parameters import RED, WHITE, BLUE, SQUARE_SIZE
 from .board import Board
+from .renderer import Renderer
+from .record import RecordWriter, positions
 
 
 class Game:
@@ -13,16 +15,18 @@ class Game:
         """
         self._init()
         self.win = win
+        self.renderer = Renderer(win)
 
-    def update(self):
+    def update(self, status=None):
         """
         Update the game display.
 
-        Draws the board and valid move indicators.
+        Only the squares changed since the last update are redrawn, see utils.renderer.
+
+        Args:
+        - status: Optional text shown at the top left, e.g. the AI's search progress.
         """
-        self.board.draw(self.win)
-        self.draw_valid_moves(self.valid_moves)
-        pygame.display.update()
+        self.renderer.render(self.board, self.valid_moves, status)
 
     def _init(self):
         """
@@ -32,15 +36,23 @@ class Game:
         self.board = Board()
         self.turn = RED
         self.valid_moves = {}
+        # Moves played so far as ((row, col), (row, col)), for saving the game
+        self.moves = []
 
     def winner(self):
         """
         Get the winner of the game.
 
+        The side to move loses when it has no piece or no legal move left, and the
+        draw rules of Board.is_draw apply.
+
         Returns:
-        - The winner's message or None if the game is ongoing.
+        - The winner's message, "Draw", or None if the game is ongoing.
         """
-        return self.board.winner()
+        result = self.board.result(self.turn)
+        if result is None:
+            return None
+        return "Draw" if result == 'draw' else f"{result} is Winner"
 
     def reset(self):
         """
@@ -86,6 +98,7 @@ class Game:
         """
         piece = self.board.get_piece(row, col)
         if self.selected and piece == 0 and (row, col) in self.valid_moves:
+            self.moves.append(((self.selected.row, self.selected.col), (row, col)))
             self.board.move(self.selected, row, col)
             skipped = self.valid_moves[(row, col)]
             if skipped:
@@ -129,12 +142,52 @@ class Game:
         """
         return self.board
 
-    def ai_move(self, board):
+    def ai_move(self, board, move=None):
         """
         Make a move on the board for the AI player.
 
         Args:
-        - board: The new game board state after the AI's move.
-        """
+        - board: The new game board state after the AI's move, or None when the AI
+          found no move: the game is over and is left as it is.
+        - move: The move played, as a (piece, destination, skip) tuple of the board
+          before it, to record it in the game.
+        """
+        if board is None:
+            return
+        if move is not None:
+            self.moves.append(((move[0].row, move[0].col), move[1]))
         self.board = board
         self.change_turn()
+
+    def save(self, path, metadata=None):
+        """
+        Append the game so far to a game archive, see utils.record.
+
+        Args:
+        - path: The archive file.
+        - metadata: Optional dictionary stored with the game.
+
+        Returns:
+        - The offset of the game in the archive.
+        """
+        result = self.board.result(self.turn)
+        writer = RecordWriter(path)
+        try:
+            return writer.write(self.moves, result, metadata)
+        finally:
+            writer.close()
+
+    def load(self, record):
+        """
+        Replay a recorded game, e.g. one read from a utils.record.GameArchive.
+
+        Args:
+        - record: The GameRecord.
+
+        Raises:
+        - ValueError if a recorded move is not legal.
+        """
+        self._init()
+        for board, color in positions(record.moves):
+            self.board, self.turn = board, color
+        self.moves = list(record.moves)
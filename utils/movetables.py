@@ -0,0 +1,69 @@
+"""
+Move and jump lookup tables of the 32 playable squares, built once at import.
+
+Squares are numbered like in utils.bitboard: the square on (row, col) is
+4 * row + col // 2. For every square and direction the tables give the adjacent
+square and the landing square of a jump, or None off the board.
+"""
+from .parameters import ROWS, COLS
+
+SQUARES = 32
+
+UP_LEFT, UP_RIGHT, DOWN_LEFT, DOWN_RIGHT = range(4)
+# (row step, column step) of each direction
+DIRECTIONS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+# A man moves up if RED and down if WHITE, a king both ways. A jump chain keeps the
+# vertical direction of its first jump.
+UP = (UP_LEFT, UP_RIGHT)
+DOWN = (DOWN_LEFT, DOWN_RIGHT)
+ONWARD = (UP, UP, DOWN, DOWN)
+
+# (row, col) of every square
+COORDINATES = tuple((square // 4, 2 * (square % 4) + (square // 4 + 1) % 2) for square in range(SQUARES))
+
+
+def _target(square, direction, distance):
+    """
+    Get the square a number of steps away in a direction.
+
+    Args:
+    - square: The starting square.
+    - direction: One of UP_LEFT, UP_RIGHT, DOWN_LEFT and DOWN_RIGHT.
+    - distance: The number of diagonal steps.
+
+    Returns:
+    - The square reached, or None if it is off the board.
+    """
+    row, col = COORDINATES[square]
+    row += DIRECTIONS[direction][0] * distance
+    col += DIRECTIONS[direction][1] * distance
+    if 0 <= row < ROWS and 0 <= col < COLS:
+        return 4 * row + col // 2
+    return None
+
+
+# NEIGHBOURS[square][direction]: the adjacent square.
+NEIGHBOURS = tuple(tuple(_target(square, direction, 1) for direction in range(4)) for square in range(SQUARES))
+# JUMPS[square][direction]: the landing square of a jump over the adjacent square.
+JUMPS = tuple(tuple(_target(square, direction, 2) for direction in range(4)) for square in range(SQUARES))
+# The landing squares of the second and later jumps of a chain. Going up, these
+# never reach row 0: Board.get_valid_moves has always stopped a chain's upward
+# scan before the top row, and the tables keep that rule.
+CHAIN_JUMPS = tuple(
+    tuple(None if direction in UP and landing is not None and landing < 4 else landing
+          for direction, landing in enumerate(jumps))
+    for jumps in JUMPS
+)
+
+
+def _steps(square, directions):
+    """
+    Get the mask of the squares adjacent to a square in some directions.
+    """
+    return sum(1 << NEIGHBOURS[square][direction] for direction in directions
+               if NEIGHBOURS[square][direction] is not None)
+
+
+# UP_STEPS[square], DOWN_STEPS[square]: masks of the adjacent squares upwards and downwards.
+UP_STEPS = tuple(_steps(square, UP) for square in range(SQUARES))
+DOWN_STEPS = tuple(_steps(square, DOWN) for square in range(SQUARES))
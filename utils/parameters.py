@@ -1,5 +1,3 @@
-import pygame
-
 WIDTH, HEIGHT = 800, 800
 ROWS, COLS = 8, 8
 SQUARE_SIZE = WIDTH//COLS
@@ -7,6 +5,18 @@ SQUARE_SIZE = WIDTH//COLS
 # Frame per Second
 FPS = 60
 
+# Thinking time allowed for each AI move, in milliseconds
+AI_TIME_BUDGET = 1000
+
+# Endgame tablebase used by the AI when the file exists, see minimax/tablebase.py
+TABLEBASE_FILE = 'endgame.tb'
+
+# Opening book used by the AI when the file exists, see minimax/book.py
+BOOK_FILE = 'opening.book'
+
+# Game archive the S key appends the current game to, see utils/record.py
+RECORD_FILE = 'games.ckr'
+
 # Colors
 RED = (255, 0, 0)
 WHITE = (255, 255, 255)
@@ -14,5 +24,3 @@ BLACK = (0, 0, 0)
 BLUE = (0, 0, 255)
 GREY = (128,128,128)
 GREEN = (1, 50, 32)
-
-CROWN = pygame.transform.scale(pygame.image.load('assets/crown.png'), (44, 25))
@@ -1,6 +1,22 @@
 # Import necessary constants and modules
-from .parameters import SQUARE_SIZE, GREY, CROWN
-import pygame
+from .parameters import SQUARE_SIZE, GREY
+
+# Crown image, loaded on first draw so the engine can run without pygame.
+_crown = None
+
+
+def get_crown():
+    """
+    Get the crown image drawn on kings, loading it on first use.
+
+    Returns:
+    - The scaled crown surface.
+    """
+    global _crown
+    if _crown is None:
+        import pygame
+        _crown = pygame.transform.scale(pygame.image.load('assets/crown.png'), (44, 25))
+    return _crown
 
 
 class Piece:
@@ -8,6 +24,10 @@ class Piece:
     PADDING = 15
     OUTLINE = 2
 
+    # Pieces are copied with every board the search copies, so keep them small. Their
+    # screen position is worked out when drawing, see utils.renderer.
+    __slots__ = ('row', 'col', 'color', 'king')
+
     def __init__(self, row, col, color):
         """
         Initialize a Piece instance.
@@ -21,16 +41,21 @@ class Piece:
         self.col = col
         self.color = color
         self.king = False
-        self.x = 0
-        self.y = 0
-        self.calc_pos()
 
-    def calc_pos(self):
+    def __deepcopy__(self, memo):
         """
-        Calculate the screen position (x, y) based on the row and column.
+        Copy the piece. Its fields are immutable, so this skips deepcopy's generic
+        reconstruction.
+
+        Args:
+        - memo: The memo dictionary of copy.deepcopy.
+
+        Returns:
+        - A new Piece on the same square.
         """
-        self.x = SQUARE_SIZE * self.col + SQUARE_SIZE // 2
-        self.y = SQUARE_SIZE * self.row + SQUARE_SIZE // 2
+        piece = Piece(self.row, self.col, self.color)
+        piece.king = self.king
+        return piece
 
     def make_king(self):
         """
@@ -45,14 +70,19 @@ class Piece:
         Args:
         - win: The game window.
         """
+        import pygame
+        from .renderer import square_rect
+
         # Calculate radius and draw the circle representing the piece
+        x, y = square_rect(self.row, self.col).center
         radius = SQUARE_SIZE // 2 - self.PADDING
-        pygame.draw.circle(win, GREY, (self.x, self.y), radius + self.OUTLINE)
-        pygame.draw.circle(win, self.color, (self.x, self.y), radius)
+        pygame.draw.circle(win, GREY, (x, y), radius + self.OUTLINE)
+        pygame.draw.circle(win, self.color, (x, y), radius)
 
         # If the piece is a king, draw the crown on top
         if self.king:
-            win.blit(CROWN, (self.x - CROWN.get_width() // 2, self.y - CROWN.get_height() // 2))
+            crown = get_crown()
+            win.blit(crown, (x - crown.get_width() // 2, y - crown.get_height() // 2))
 
     def move(self, row, col):
         """
@@ -64,7 +94,6 @@ class Piece:
         """
         self.row = row
         self.col = col
-        self.calc_pos()
 
     def __repr__(self):
         """
@@ -0,0 +1,35 @@
+from .parameters import ROWS, COLS, RED, WHITE
+
+# Squares of the centre: the dark squares of the four middle columns of the two middle rows.
+CENTRE = frozenset((row, col) for row in (3, 4) for col in range(2, 6) if (row + col) % 2 == 1)
+
+
+def positional_terms(row, col, color, king):
+    """
+    Get what a piece on a square adds to the positional accumulators of a Board.
+
+    Every term is from WHITE's point of view, so RED pieces count negatively.
+
+    Args:
+    - row: The row of the piece.
+    - col: The column of the piece.
+    - color: The color of the piece.
+    - king: Whether the piece is a king.
+
+    Returns:
+    - A (tempo, back_rank, piece_square) tuple: rows advanced by a man from its home
+      row, 1 for a man still on its home row, and 1 for a piece on a centre square.
+    """
+    sign = 1 if color == WHITE else -1
+    home = 0 if color == WHITE else ROWS - 1
+    tempo = 0 if king else abs(row - home)
+    back_rank = 1 if not king and row == home else 0
+    piece_square = 1 if (row, col) in CENTRE else 0
+    return sign * tempo, sign * back_rank, sign * piece_square
+
+
+# Terms of every (color, king) on every square, looked up by Board.move and Board.remove.
+TERMS = {
+    (color, king): [[positional_terms(row, col, color, king) for col in range(COLS)] for row in range(ROWS)]
+    for color in (RED, WHITE) for king in (False, True)
+}
@@ -0,0 +1,400 @@
+"""
+Game records: a compact binary archive of games and an index of the positions they reach.
+
+Archive layout, all little-endian:
+    b'CKGR', version (u16),
+    then the games one after another, each
+    move count (u16), metadata length (u16), result (u8),
+    the moves (u16 each: origin square << 5 | destination square),
+    the metadata (UTF-8 JSON, may be empty).
+
+Squares are numbered like in utils.bitboard, 4 * row + col // 2. A move's captures
+follow from the rules, so a game costs two bytes per ply plus its metadata. Every
+game starts from the initial position with RED to move. Games are appended and
+read one at a time, so archives of any size stream in constant memory, and a game
+is identified by its byte offset in the archive.
+
+Index layout:
+    b'CKGI', version (u16), entry count (u64),
+    then (position key (u64), game offset (u64)) pairs sorted by key,
+one pair per distinct position each game reaches, keyed like zobrist.position_key.
+
+Build the index of an archive, e.g. one written by selfplay.py --record, with:
+    python -m utils.record index games.ckr --output games.idx
+"""
+import argparse
+import heapq
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from collections import namedtuple
+from .board import Board
+from .movetables import COORDINATES
+from .parameters import RED, WHITE
+from .zobrist import position_key
+
+MAGIC = b'CKGR'
+VERSION = 1
+HEADER = struct.Struct('<4sH')
+GAME = struct.Struct('<HHB')
+
+INDEX_MAGIC = b'CKGI'
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct('<4sHQ')
+INDEX_ENTRY = struct.Struct('<QQ')
+
+# Results, stored as their position in this tuple; None is a game not finished.
+RESULTS = (None, 'RED', 'WHITE', 'draw')
+
+# A game read from an archive: its offset, moves as ((row, col), (row, col)), result and metadata dictionary.
+GameRecord = namedtuple('GameRecord', ['offset', 'moves', 'result', 'metadata'])
+
+
+def encode_move(origin, destination):
+    """
+    Encode a move as a 10-bit integer.
+
+    Args:
+    - origin: The (row, col) the piece moves from.
+    - destination: The (row, col) it ends on.
+
+    Returns:
+    - origin square << 5 | destination square.
+    """
+    return (4 * origin[0] + origin[1] // 2) << 5 | 4 * destination[0] + destination[1] // 2
+
+
+def decode_move(value):
+    """
+    Decode a move made by encode_move.
+
+    Returns:
+    - The ((row, col), (row, col)) of the move.
+    """
+    return COORDINATES[value >> 5], COORDINATES[value & 31]
+
+
+def play(board, origin, destination):
+    """
+    Play a recorded move on a board.
+
+    Args:
+    - board: The board, changed in place.
+    - origin: The (row, col) the piece moves from.
+    - destination: The (row, col) it ends on.
+
+    Raises:
+    - ValueError if the move is not legal on the board.
+    """
+    piece = board.get_piece(*origin)
+    moves = board.get_valid_moves(piece) if piece != 0 else {}
+    if destination not in moves:
+        raise ValueError(f"illegal move {origin} -> {destination}")
+    board.make_move(piece, destination[0], destination[1], moves[destination])
+
+
+def positions(moves):
+    """
+    Replay a game and go through the positions it reaches.
+
+    Args:
+    - moves: The moves of the game as ((row, col), (row, col)).
+
+    Yields:
+    - (board, color) before each move and after the last: the board and the side to
+      move. The same Board is updated in place between steps.
+    """
+    board = Board()
+    color = RED
+    yield board, color
+    for origin, destination in moves:
+        play(board, origin, destination)
+        color = WHITE if color == RED else RED
+        yield board, color
+
+
+class RecordWriter:
+    def __init__(self, path):
+        """
+        Open an archive for appending games, creating it if needed.
+
+        Args:
+        - path: The archive file.
+        """
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(HEADER.pack(MAGIC, VERSION))
+
+    def write(self, moves, result=None, metadata=None):
+        """
+        Append a game.
+
+        Args:
+        - moves: The moves of the game as ((row, col), (row, col)).
+        - result: 'RED', 'WHITE', 'draw' or None if the game is not finished.
+        - metadata: Optional JSON-serialisable dictionary, e.g. the players' levels.
+
+        Returns:
+        - The offset of the game in the archive.
+        """
+        offset = self.file.tell()
+        data = json.dumps(metadata, separators=(',', ':')).encode() if metadata else b''
+        encoded = array('H', (encode_move(origin, destination) for origin, destination in moves))
+        if sys.byteorder == 'big':
+            encoded.byteswap()
+        self.file.write(GAME.pack(len(encoded), len(data), RESULTS.index(result)))
+        self.file.write(encoded.tobytes())
+        self.file.write(data)
+        return offset
+
+    def flush(self):
+        """Push the games written so far to the file."""
+        self.file.flush()
+
+    def close(self):
+        """Close the archive."""
+        self.file.close()
+
+
+class GameArchive:
+    def __init__(self, path):
+        """
+        Open an archive for reading.
+
+        Args:
+        - path: The archive file.
+        """
+        self.file = open(path, 'rb')
+        magic, version = HEADER.unpack(self.file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} game archive")
+
+    def _read(self):
+        """
+        Read the game at the current position of the file.
+
+        Returns:
+        - A GameRecord, or None at the end of the archive.
+        """
+        offset = self.file.tell()
+        header = self.file.read(GAME.size)
+        if len(header) < GAME.size:
+            return None
+        count, length, result = GAME.unpack(header)
+        encoded = array('H')
+        encoded.frombytes(self.file.read(2 * count))
+        if sys.byteorder == 'big':
+            encoded.byteswap()
+        data = self.file.read(length)
+        return GameRecord(offset, [decode_move(value) for value in encoded], RESULTS[result],
+                          json.loads(data) if data else {})
+
+    def __iter__(self):
+        """
+        Go through the games from the start, reading one at a time.
+
+        Yields:
+        - GameRecords in archive order.
+        """
+        self.file.seek(HEADER.size)
+        while True:
+            game = self._read()
+            if game is None:
+                return
+            yield game
+
+    def game(self, offset):
+        """
+        Read the game at an offset, e.g. one returned by RecordWriter.write or GameIndex.
+
+        Args:
+        - offset: The offset of the game.
+
+        Returns:
+        - The GameRecord.
+        """
+        self.file.seek(offset)
+        return self._read()
+
+    def close(self):
+        """Close the archive."""
+        self.file.close()
+
+
+def _write_pairs(pairs, output):
+    """Write (key << 64 | offset) integers as little-endian (key, offset) pairs."""
+    block = array('Q')
+    for pair in pairs:
+        block.append(pair >> 64)
+        block.append(pair & 0xFFFFFFFFFFFFFFFF)
+        if len(block) >= 1 << 16:
+            _write_block(block, output)
+            block = array('Q')
+    _write_block(block, output)
+
+
+def _write_block(block, output):
+    """Write an array of u64 little-endian."""
+    if sys.byteorder == 'big':
+        block.byteswap()
+    block.tofile(output)
+
+
+def _read_pairs(source):
+    """Read the pairs written by _write_pairs back as (key << 64 | offset) integers."""
+    while True:
+        block = array('Q')
+        data = source.read(1 << 19)
+        if not data:
+            return
+        block.frombytes(data)
+        if sys.byteorder == 'big':
+            block.byteswap()
+        for index in range(0, len(block), 2):
+            yield block[index] << 64 | block[index + 1]
+
+
+def build_index(archive_path, index_path, chunk_size=1 << 20, progress=None):
+    """
+    Index the positions reached by every game of an archive.
+
+    The (position, game) pairs are sorted in chunks of chunk_size in memory, spilled
+    to temporary files and merged, so archives much larger than memory can be
+    indexed.
+
+    Args:
+    - archive_path: The archive to index.
+    - index_path: The index file to write.
+    - chunk_size: Pairs sorted in memory at a time.
+    - progress: Optional function called with a message after each chunk.
+
+    Returns:
+    - The number of pairs in the index.
+    """
+    archive = GameArchive(archive_path)
+    chunks, pairs, games, count = [], [], 0, 0
+
+    def spill():
+        chunk = tempfile.TemporaryFile()
+        pairs.sort()
+        _write_pairs(pairs, chunk)
+        chunk.seek(0)
+        chunks.append(chunk)
+        pairs.clear()
+        if progress is not None:
+            progress(f"{games} games, {count} positions")
+
+    try:
+        for game in archive:
+            games += 1
+            keys = {position_key(board.hash, color == WHITE) for board, color in positions(game.moves)}
+            pairs.extend(key << 64 | game.offset for key in keys)
+            count += len(keys)
+            if len(pairs) >= chunk_size:
+                spill()
+        if pairs or not chunks:
+            spill()
+        with open(index_path, 'wb') as output:
+            output.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, count))
+            _write_pairs(heapq.merge(*(_read_pairs(chunk) for chunk in chunks)), output)
+    finally:
+        archive.close()
+        for chunk in chunks:
+            chunk.close()
+    return count
+
+
+class GameIndex:
+    def __init__(self, path):
+        """
+        Open an index file. The file is memory-mapped and searched in place.
+
+        Args:
+        - path: The file written by build_index.
+        """
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count = INDEX_HEADER.unpack_from(self.data, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError(f"{path} is not a version {INDEX_VERSION} game index")
+
+    def __len__(self):
+        return self.count
+
+    def lookup(self, key):
+        """
+        Find the games that reached a position.
+
+        Args:
+        - key: The zobrist.position_key of the position.
+
+        Returns:
+        - The archive offsets of the games, in increasing order.
+        """
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if struct.unpack_from('<Q', self.data, INDEX_HEADER.size + middle * INDEX_ENTRY.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        offsets = []
+        for index in range(low, self.count):
+            entry_key, offset = INDEX_ENTRY.unpack_from(self.data, INDEX_HEADER.size + index * INDEX_ENTRY.size)
+            if entry_key != key:
+                break
+            offsets.append(offset)
+        return offsets
+
+    def games(self, board, max_player):
+        """
+        Find the games that reached the position of a board.
+
+        Args:
+        - board: The position.
+        - max_player: True if WHITE (the maximizing player) is to move.
+
+        Returns:
+        - The archive offsets of the games.
+        """
+        return self.lookup(position_key(board.hash, max_player))
+
+    def close(self):
+        """
+        Release the memory map and the file.
+        """
+        self.data.close()
+        self.file.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index or list game archives.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    index = commands.add_parser('index', help='index the positions of an archive')
+    index.add_argument('archive', help='archive file')
+    index.add_argument('--output', default=None, help="index file to write, the archive's with .idx by default")
+    index.add_argument('--chunk-size', type=int, default=1 << 20, help='pairs sorted in memory at a time')
+    listing = commands.add_parser('list', help='print the games of an archive as JSON Lines')
+    listing.add_argument('archive', help='archive file')
+    options = parser.parse_args(argv)
+
+    if options.command == 'index':
+        output = options.output or os.path.splitext(options.archive)[0] + '.idx'
+        count = build_index(options.archive, output, options.chunk_size,
+                            progress=lambda message: print(message, file=sys.stderr))
+        print(f"{count} positions indexed in {output}", file=sys.stderr)
+    else:
+        archive = GameArchive(options.archive)
+        try:
+            for game in archive:
+                print(json.dumps(game._asdict()))
+        finally:
+            archive.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""
+Incremental drawing of the game window.
+
+The Renderer keeps what it drew last: the piece and move marker on every square and
+the status line. Each frame it redraws only the squares whose contents changed,
+from a cached surface of the empty board and one cached sprite per kind of piece,
+and updates only those rectangles of the display. A frame where nothing changed
+costs a comparison of 64 squares and touches no pixels.
+"""
+import pygame
+from .parameters import BLACK, BLUE, GREY, ROWS, COLS, SQUARE_SIZE, RED, WHITE
+from .piece import Piece, get_crown
+
+
+def square_rect(row, col):
+    """
+    Get the screen rectangle of a square.
+
+    Args:
+    - row: The row of the square.
+    - col: The column of the square.
+
+    Returns:
+    - A pygame.Rect.
+    """
+    return pygame.Rect(col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE)
+
+
+class Renderer:
+    # Top left corner of the status line, and the margin of its background
+    STATUS_POS = (10, 10)
+    STATUS_MARGIN = (12, 8)
+    MARKER_RADIUS = 15
+
+    def __init__(self, win):
+        """
+        Initialize a renderer drawing on a window.
+
+        Args:
+        - win: The game window.
+        """
+        self.win = win
+        self.background = None
+        self.sprites = None
+        self.font = None
+        # What is on screen: (color, king) or None per square, the squares with a move
+        # marker, and the status text with its rectangle.
+        self.drawn = None
+        self.markers = frozenset()
+        self.status = None
+        self.status_rect = None
+
+    def _load(self):
+        """
+        Draw the empty board and the piece sprites once. Needs the display to be set up.
+        """
+        self.background = pygame.Surface(self.win.get_size()).convert()
+        self.background.fill(BLACK)
+        for row in range(ROWS):
+            for col in range(row % 2, COLS, 2):
+                pygame.draw.rect(self.background, GREY, square_rect(row, col))
+
+        radius = SQUARE_SIZE // 2 - Piece.PADDING
+        centre = (SQUARE_SIZE // 2, SQUARE_SIZE // 2)
+        self.sprites = {}
+        for color in (RED, WHITE):
+            for king in (False, True):
+                sprite = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA).convert_alpha()
+                pygame.draw.circle(sprite, GREY, centre, radius + Piece.OUTLINE)
+                pygame.draw.circle(sprite, color, centre, radius)
+                if king:
+                    crown = get_crown()
+                    sprite.blit(crown, (centre[0] - crown.get_width() // 2, centre[1] - crown.get_height() // 2))
+                self.sprites[(color, king)] = sprite
+        self.font = pygame.font.SysFont(None, 28)
+
+    def invalidate(self):
+        """
+        Forget what is on screen, so the next render draws the whole window, e.g.
+        after something else drew on it or the window was uncovered.
+        """
+        self.drawn = None
+
+    def render(self, board, valid_moves=(), status=None):
+        """
+        Bring the window up to date with the board, updating only what changed.
+
+        Args:
+        - board: The Board to show.
+        - valid_moves: The squares marked as valid moves of the selected piece.
+        - status: Optional text shown at the top left, e.g. the AI's search progress.
+
+        Returns:
+        - The list of rectangles updated on the display, empty if nothing changed.
+        """
+        if self.background is None:
+            self._load()
+
+        cells = [(piece.color, piece.king) if piece != 0 else None for row in board.board for piece in row]
+        markers = frozenset(valid_moves)
+        if self.drawn is None:
+            self.win.blit(self.background, (0, 0))
+            dirty_squares = [(row, col) for row in range(ROWS) for col in range(COLS)]
+            full = True
+        else:
+            dirty_squares = [divmod(index, COLS) for index, cell in enumerate(cells) if cell != self.drawn[index]]
+            dirty_squares.extend(square for square in markers ^ self.markers if square not in dirty_squares)
+            full = False
+
+        dirty = []
+        if status != self.status or full:
+            if self.status_rect is not None and not full:
+                # Uncover the squares under the old status line
+                for index in range(ROWS * COLS):
+                    square = divmod(index, COLS)
+                    if square not in dirty_squares and square_rect(*square).colliderect(self.status_rect):
+                        dirty_squares.append(square)
+                dirty.append(self.status_rect)
+            self.status_rect = None
+
+        for row, col in dirty_squares:
+            rect = square_rect(row, col)
+            self._draw_square(rect, cells[row * COLS + col], (row, col) in markers)
+            if not full:
+                dirty.append(rect)
+
+        if status and (self.status_rect is None or any(rect.colliderect(self.status_rect) for rect in dirty)):
+            self.status_rect = self._draw_status(status)
+            dirty.append(self.status_rect)
+
+        self.drawn = cells
+        self.markers = markers
+        self.status = status
+        if full:
+            dirty = [self.win.get_rect()]
+        if dirty:
+            pygame.display.update(dirty)
+        return dirty
+
+    def _draw_square(self, rect, cell, marker):
+        """
+        Draw a square with its piece and move marker.
+
+        Args:
+        - rect: The screen rectangle of the square.
+        - cell: The (color, king) of the piece on the square, or None.
+        - marker: Whether to draw a valid move marker.
+        """
+        self.win.blit(self.background, rect, rect)
+        if cell is not None:
+            self.win.blit(self.sprites[cell], rect)
+        if marker:
+            pygame.draw.circle(self.win, BLUE, rect.center, self.MARKER_RADIUS)
+
+    def _draw_status(self, text):
+        """
+        Draw a line of text on a dark background.
+
+        Args:
+        - text: The text to draw.
+
+        Returns:
+        - The rectangle drawn over.
+        """
+        surface = self.font.render(text, True, WHITE)
+        background = surface.get_rect(topleft=self.STATUS_POS).inflate(*self.STATUS_MARGIN)
+        pygame.draw.rect(self.win, BLACK, background)
+        self.win.blit(surface, self.STATUS_POS)
+        return background
@@ -0,0 +1,42 @@
+import random
+from .parameters import ROWS, COLS, RED, WHITE
+
+# Fixed seed so hashes are stable across runs and processes.
+_random = random.Random(0x5EED)
+
+# One key per (color, king, row, col), plus one for the side to move.
+PIECE_KEYS = {
+    (color, king): [[_random.getrandbits(64) for _ in range(COLS)] for _ in range(ROWS)]
+    for color in (RED, WHITE) for king in (False, True)
+}
+WHITE_TO_MOVE = _random.getrandbits(64)
+
+
+def piece_key(row, col, color, king):
+    """
+    Get the Zobrist key of a piece on a square.
+
+    Args:
+    - row: The row of the piece.
+    - col: The column of the piece.
+    - color: The color of the piece.
+    - king: Whether the piece is a king.
+
+    Returns:
+    - The 64-bit key.
+    """
+    return PIECE_KEYS[(color, king)][row][col]
+
+
+def position_key(board_hash, max_player):
+    """
+    Combine a board hash with the side to move.
+
+    Args:
+    - board_hash: The Zobrist hash of the pieces, as kept by Board.hash.
+    - max_player: True if WHITE (the maximizing player) is to move.
+
+    Returns:
+    - The 64-bit key of the position.
+    """
+    return board_hash ^ WHITE_TO_MOVE if max_player else board_hash